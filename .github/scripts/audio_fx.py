@@ -0,0 +1,149 @@
+"""
+In-memory audio effects chain for the TTS voices.
+
+Everything runs on the float32 buffer Kokoro hands back, so the voice
+scripts no longer need a temp WAV plus an ffmpeg round trip just to
+pitch, stretch or re-level a few seconds of speech.
+"""
+import numpy as np
+from fractions import Fraction
+from scipy import signal
+from scipy.io import wavfile
+
+SAMPLE_RATE = 24000
+
+# --- EFFECTS ---
+
+def gain(audio, factor=1.0):
+    """Linear gain, same as ffmpeg's volume=<factor>."""
+    return audio * np.float32(factor)
+
+def limit(audio, ceiling=1.0):
+    """Hard clip to +/- ceiling."""
+    return np.clip(audio, -ceiling, ceiling)
+
+def normalize(audio, peak=1.0, only_if_louder=False):
+    """Scale so the loudest sample sits at `peak`."""
+    max_val = float(np.abs(audio).max()) if audio.size else 0.0
+    if max_val == 0 or (only_if_louder and max_val <= peak):
+        return audio
+    return audio * np.float32(peak / max_val)
+
+def pitch_shift(audio, factor=1.0):
+    """
+    Equivalent of asetrate=sr*factor,aresample=sr: the signal is resampled so
+    it plays back `factor` times the pitch (and speed) at the same rate.
+    """
+    if factor == 1.0:
+        return audio
+    ratio = Fraction(factor).limit_denominator(100)
+    return signal.resample_poly(audio, ratio.denominator, ratio.numerator).astype(np.float32)
+
+def time_stretch(audio, tempo=1.0, frame=512, tolerance=128):
+    """
+    WSOLA tempo change (what ffmpeg's atempo does) without touching pitch.
+    tempo > 1 speeds speech up, tempo < 1 slows it down.
+    """
+    if tempo == 1.0 or len(audio) < frame * 2:
+        return audio
+
+    hop = frame // 2
+    window = np.hanning(frame).astype(np.float32)
+    out_len = int(len(audio) / tempo)
+    n_frames = out_len // hop + 1
+
+    padded = np.pad(audio, (tolerance, frame + tolerance + hop))
+    out = np.zeros(n_frames * hop + frame, dtype=np.float32)
+    norm = np.zeros_like(out)
+
+    prev = 0
+    for k in range(n_frames):
+        target = int(k * hop * tempo)
+        if target + frame + 2 * tolerance > len(padded):
+            break
+        if k == 0:
+            pos = target + tolerance
+        else:
+            # Pick the candidate that best continues the previous grain
+            natural = padded[prev + hop:prev + hop + frame]
+            region = padded[target:target + frame + 2 * tolerance]
+            # Grains are short, so numpy's direct correlation beats an FFT here
+            corr = np.correlate(region, natural, mode='valid')
+            pos = target + int(np.argmax(corr))
+        out[k * hop:k * hop + frame] += padded[pos:pos + frame] * window
+        norm[k * hop:k * hop + frame] += window
+        prev = pos
+
+    norm[norm < 1e-3] = 1.0
+    return (out / norm)[:out_len]
+
+def reverb(audio, decay=0.6, wet=0.2, predelay=0.02, seed=7, keep_level=True):
+    """
+    Cheap convolution reverb: an exponentially decaying noise tail.
+    The impulse response is seeded so the same text always sounds the same.
+    With keep_level the mix is scaled back to the dry signal's RMS, so adding
+    reverb never changes loudness (the dry path alone drops by 1 - wet).
+    """
+    if wet <= 0:
+        return audio
+    length = int(decay * SAMPLE_RATE)
+    rng = np.random.default_rng(seed)
+    t = np.arange(length, dtype=np.float32) / SAMPLE_RATE
+    ir = rng.standard_normal(length).astype(np.float32) * np.exp(-6.9 * t / decay).astype(np.float32)
+    ir = np.concatenate([np.zeros(int(predelay * SAMPLE_RATE), dtype=np.float32), ir])
+    ir /= np.sqrt(np.sum(ir ** 2))
+
+    tail = signal.fftconvolve(audio, ir)[:len(audio) + length]
+    dry = np.pad(audio, (0, len(tail) - len(audio)))
+    mix = (1.0 - wet) * dry + wet * tail
+    if keep_level:
+        dry_rms = np.sqrt(np.mean(audio ** 2)) if audio.size else 0.0
+        mix_rms = np.sqrt(np.mean(mix[:len(audio)] ** 2)) if audio.size else 0.0
+        if mix_rms > 0:
+            mix *= dry_rms / mix_rms
+    return mix.astype(np.float32)
+
+EFFECTS = {
+    "gain": gain,
+    "limit": limit,
+    "normalize": normalize,
+    "pitch_shift": pitch_shift,
+    "time_stretch": time_stretch,
+    "reverb": reverb,
+}
+
+# --- PRESETS ---
+# One chain per format. Steps run top to bottom on the raw TTS buffer.
+
+PRESETS = {
+    "wyr": [
+        ("normalize", {"peak": 1.0}),
+    ],
+    "fact": [
+        ("normalize", {"peak": 1.0, "only_if_louder": True}),
+    ],
+    # Same order as the old asetrate/atempo/volume=1.2 filter, with the
+    # reverb before the gain so the final level and clipping match it
+    "horror": [
+        ("normalize", {"peak": 1.0, "only_if_louder": True}),
+        ("pitch_shift", {"factor": 0.92}),
+        ("time_stretch", {"tempo": 1.087}),
+        ("reverb", {"decay": 0.8, "wet": 0.18}),
+        ("gain", {"factor": 1.2}),
+        ("limit", {"ceiling": 1.0}),
+    ],
+}
+
+def apply_chain(audio, preset):
+    """Run a preset name (or a list of (effect, kwargs) steps) over a buffer."""
+    steps = PRESETS[preset] if isinstance(preset, str) else preset
+    audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+    for name, kwargs in steps:
+        audio = EFFECTS[name](audio, **kwargs)
+    return np.clip(audio, -1.0, 1.0).astype(np.float32)
+
+def write_wav(filename, audio, sample_rate=SAMPLE_RATE):
+    """Write a float buffer as 16-bit PCM, which MoviePy reads directly."""
+    audio_int16 = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+    wavfile.write(filename, sample_rate, audio_int16)
+    return filename
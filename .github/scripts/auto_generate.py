@@ -1,16 +1,20 @@
 import os
 import json
-import random
 import re
+import hashlib
+import argparse
 import requests
-import subprocess
-import time
-import numpy as np
-from PIL import Image
-from moviepy.editor import *
-from moviepy.config import change_settings
+import net
+import image_check
+import provider_health
+import search_cache
+import image_pool
+import seeds
+import checkpoint
+import history
 
-# Add this right after your imports, before any other code:
+# MoviePy, numpy and the TTS stack are imported where they are used so that
+# commands which never render (list, validate-history, prefetch) start fast.
 
 # Fix PIL.Image.ANTIALIAS deprecation for MoviePy compatibility
 from PIL import Image
@@ -21,22 +25,22 @@ if not hasattr(Image, 'BILINEAR'):
 
 # --- CONFIGURATION & SETUP ---
 
-change_settings({"IMAGEMAGICK_BINARY": "/usr/bin/convert"})
-
+FORMAT = "wyr"  # key for content-seeded randomness (seeds.py)
+POLLINATIONS_BUDGET = 12  # seconds before falling back to a pooled image (image_pool.py)
 BASE_DIR = os.getcwd()
 DATA_DIR = os.path.join(BASE_DIR, "data")
 OUTPUT_DIR = os.path.join(BASE_DIR, "output")
 CACHE_DIR = os.path.join(OUTPUT_DIR, "cache")
-ASSETS_DIR = os.path.join(BASE_DIR, ".github/assets")
-FONT_PATH = os.path.join(ASSETS_DIR, "fonts/Montserrat-Bold.ttf")
 
-if not os.path.exists(FONT_PATH):
-    print("⚠️ Custom font not found. Using system default.")
-    FONT_PATH = "DejaVu-Sans-Bold"
+def setup_dirs():
+    for d in [DATA_DIR, OUTPUT_DIR, CACHE_DIR]:
+        if not os.path.exists(d):
+            os.makedirs(d)
 
-for d in [DATA_DIR, OUTPUT_DIR, CACHE_DIR]:
-    if not os.path.exists(d):
-        os.makedirs(d)
+WYR_VOICE = "af_bella"
+WYR_SPEED = 1.0
+WYR_INTRO = "Would you rather"
+WYR_OUTRO = "Make your choice."
 
 # --- MODULE 1: CONTENT ENGINE ---
 
@@ -72,6 +76,10 @@ class AutoContentManager:
         return self._generate_offline()
 
     def _scrape_reddit(self):
+        return next(self.iter_candidates(), None)
+
+    def iter_candidates(self):
+        """Yield parsed, unseen WYR posts from the Pushshift archive, best first."""
         try:
             print("🌐 Fetching from Pushshift archive...")
             url = "https://api.pullpush.io/reddit/search/submission"
@@ -83,47 +91,42 @@ class AutoContentManager:
                 'fields': 'id,title,score'
             }
             
-            r = requests.get(url, params=params, timeout=15)
-            if r.status_code == 200:
-                data = r.json()
-                
-                for post in data.get('data', []):
-                    title = post.get('title', '')
-                    pid = post.get('id', '')
-                    
-                    if pid in self.history:
-                        continue
-                    
-                    match = re.search(r"(?i)would you rather\s+(.*?)\s+(?:or|,\s*or)\s+(.*)", title)
-                    if match:
-                        opt_a = match.group(1).strip('?.! ')
-                        opt_b = match.group(2).strip('?.! ')
-                        
-                        score = post.get('score', 100)
-                        stat_a = min(max(int((score % 60) + 20), 25), 75)
-                        
-                        print(f"✅ Found from Pushshift: {title[:50]}...")
-                        return {
-                            "id": pid,
-                            "option_a": opt_a,
-                            "option_b": opt_b,
-                            "stats": [stat_a, 100-stat_a]
-                        }
+            for candidate in search_cache.search(url, params, self._parse_post, self.history):
+                print(f"✅ Found from Pushshift: {candidate['option_a'][:50]}...")
+                yield candidate
         except Exception as e:
             print(f"⚠️ Pushshift failed: {e}")
-        
-        return None
+
+    def _parse_post(self, post):
+        """One raw pullpush post -> WYR scenario, or None if the title doesn't parse."""
+        match = re.search(r"(?i)would you rather\s+(.*?)\s+(?:or|,\s*or)\s+(.*)", post.get('title', ''))
+        if not match:
+            return None
+        
+        score = post.get('score', 100)
+        stat_a = min(max(int((score % 60) + 20), 25), 75)
+        return {
+            "id": post.get('id', ''),
+            "option_a": match.group(1).strip('?.! '),
+            "option_b": match.group(2).strip('?.! '),
+            "stats": [stat_a, 100-stat_a]
+        }
+
+    def validate_history(self):
+        """Report problems in the history file. Returns True when it is clean."""
+        return history.validate(self.history_file)
 
     def _generate_offline(self):
         verbs = ["Eat", "Fight", "Marry", "Lose", "Live with", "Be trapped with"]
         nouns = ["a T-Rex", "Elon Musk", "a Crying Baby", "your Ex", "a Ghost", "1000 Rats"]
         conditions = ["forever", "in space", "underwater", "every Tuesday", "naked"]
         
-        opt_a = f"{random.choice(verbs)} {random.choice(nouns)} {random.choice(conditions)}"
-        opt_b = f"{random.choice(verbs)} {random.choice(nouns)} {random.choice(conditions)}"
+        rng = seeds.rng(FORMAT, f"offline-{len(self.history)}", "scenario")
+        opt_a = f"{rng.choice(verbs)} {rng.choice(nouns)} {rng.choice(conditions)}"
+        opt_b = f"{rng.choice(verbs)} {rng.choice(nouns)} {rng.choice(conditions)}"
         
-        pid = str(abs(hash(opt_a + opt_b)))
-        s1 = random.randint(35, 65)
+        pid = seeds.stable_id("offline", opt_a, opt_b)
+        s1 = rng.randint(35, 65)
         
         return {"id": pid, "option_a": opt_a, "option_b": opt_b, "stats": [s1, 100-s1]}
 
@@ -132,9 +135,13 @@ class AutoContentManager:
 class AssetGenerator:
     def get_ai_image(self, prompt, side):
         """Multi-provider image generation with smart fallbacks"""
-        filename = os.path.join(CACHE_DIR, f"{side}_{abs(hash(prompt))}.jpg")
+        filename = os.path.join(CACHE_DIR, f"{side}_{hashlib.md5(prompt.encode('utf-8')).hexdigest()[:16]}.jpg")
         width, height = 1080, 960
         
+        if image_check.is_valid(filename, (width, height), video_format=FORMAT):
+            print(f"♻️ Using prefetched image: {prompt[:30]}...")
+            return filename
+        
         topic_keywords = prompt.lower()
         if "fight" in topic_keywords or "battle" in topic_keywords:
             topic = "action"
@@ -151,18 +158,36 @@ class AssetGenerator:
         
         providers = [
             ("Pollinations", lambda: self._generate_pollinations(prompt, filename, width, height)),
+            ("Pool", lambda: image_pool.take(topic, (width, height), filename)),
             ("Unsplash", lambda: self._generate_unsplash(topic, filename, width, height)),
             ("Pexels", lambda: self._generate_pexels(topic, filename, width, height)),
             ("Picsum", lambda: self._generate_picsum(filename, width, height))
         ]
         
-        for provider_name, provider_func in providers:
+        # Pollinations is the only prompt-matched source; a prefetched topic
+        # image comes next, then the stock fallbacks fastest-first by their
+        # recorded latency and success rate
+        for provider_name, provider_func in provider_health.order(providers, pinned=["Pollinations", "Pool"]):
             try:
                 print(f"🎨 Trying {provider_name}: {prompt[:30]}...")
-                result = provider_func()
-                if result and os.path.exists(result) and os.path.getsize(result) > 5000:
-                    print(f"✅ {provider_name} succeeded")
-                    return result
+                if provider_name == "Pool":
+                    # Local and instant: not a provider to keep health stats on
+                    result = provider_func()
+                    if not result:
+                        raise Exception("pool empty")
+                else:
+                    with provider_health.track(provider_name):
+                        result = provider_func()
+                # Checked outside track(): a poor image is not an outage
+                image_check.validate(result, (width, height), video_format=FORMAT)
+                print(f"✅ {provider_name} succeeded")
+                return result
+            except provider_health.CircuitOpen as e:
+                print(f"⏭️ Skipping {provider_name}: {e}")
+            except image_check.ImageRejected as e:
+                print(f"🚫 {provider_name} image rejected: {e.reason}")
+                if os.path.exists(filename):
+                    os.remove(filename)
             except Exception as e:
                 print(f"⚠️ {provider_name} failed: {str(e)[:50]}")
                 continue
@@ -171,9 +196,10 @@ class AssetGenerator:
         return None
     
     def _generate_pollinations(self, prompt, filename, width, height):
+        rng = seeds.rng(FORMAT, os.path.basename(filename), "pollinations")
         negative = "blurry,low quality,watermark,text,logo,ui,overlay,frame,border"
         formatted = f"{prompt}, cinematic, detailed, vibrant, no text, no logos, clean image"
-        seed = random.randint(1, 999999)
+        seed = rng.randint(1, 999999)
         
         url = (
             f"https://image.pollinations.ai/prompt/{requests.utils.quote(formatted)}"
@@ -182,7 +208,7 @@ class AssetGenerator:
             f"&nologo=true&enhance=true&seed={seed}"
         )
         
-        r = requests.get(url, timeout=20)
+        r = net.get(url, timeout=POLLINATIONS_BUDGET)
         if r.status_code == 200 and "image" in r.headers.get("Content-Type", ""):
             with open(filename, 'wb') as f:
                 f.write(r.content)
@@ -190,10 +216,11 @@ class AssetGenerator:
         raise Exception(f"Status {r.status_code}")
     
     def _generate_unsplash(self, topic, filename, width, height):
-        seed = random.randint(1, 9999)
+        rng = seeds.rng(FORMAT, os.path.basename(filename), "unsplash")
+        seed = rng.randint(1, 9999)
         url = f"https://source.unsplash.com/{width}x{height}/?{topic}&sig={seed}"
         
-        r = requests.get(url, timeout=15, allow_redirects=True)
+        r = net.get(url, timeout=15, allow_redirects=True)
         if r.status_code == 200 and "image" in r.headers.get("Content-Type", ""):
             with open(filename, 'wb') as f:
                 f.write(r.content)
@@ -201,6 +228,7 @@ class AssetGenerator:
         raise Exception(f"Status {r.status_code}")
     
     def _generate_pexels(self, topic, filename, width, height):
+        rng = seeds.rng(FORMAT, os.path.basename(filename), "pexels")
         photo_ids = {
             "action": [2045531, 6153896, 8386440, 1181244, 4974912, 3861959],
             "food": [1640777, 1410235, 2097090, 262959, 3338496, 3764640],
@@ -211,12 +239,12 @@ class AssetGenerator:
         }
         
         ids = photo_ids.get(topic, photo_ids["abstract"])
-        photo_id = random.choice(ids)
-        seed = random.randint(1000, 9999)
+        photo_id = rng.choice(ids)
+        seed = rng.randint(1000, 9999)
         
         url = f"https://images.pexels.com/photos/{photo_id}/pexels-photo-{photo_id}.jpeg?auto=compress&cs=tinysrgb&w={width}&h={height}&random={seed}"
         
-        r = requests.get(url, timeout=15)
+        r = net.get(url, timeout=15)
         if r.status_code == 200 and "image" in r.headers.get("Content-Type", ""):
             with open(filename, 'wb') as f:
                 f.write(r.content)
@@ -228,10 +256,11 @@ class AssetGenerator:
         raise Exception(f"Status {r.status_code}")
     
     def _generate_picsum(self, filename, width, height):
-        seed = random.randint(1, 1000)
+        rng = seeds.rng(FORMAT, os.path.basename(filename), "picsum")
+        seed = rng.randint(1, 1000)
         url = f"https://picsum.photos/{width}/{height}?random={seed}"
         
-        r = requests.get(url, timeout=15, allow_redirects=True)
+        r = net.get(url, timeout=15, allow_redirects=True)
         if r.status_code == 200 and "image" in r.headers.get("Content-Type", ""):
             with open(filename, 'wb') as f:
                 f.write(r.content)
@@ -239,6 +268,8 @@ class AssetGenerator:
         raise Exception(f"Status {r.status_code}")
 
     def create_gradient(self, w, h, c1, c2):
+        import numpy as np
+        from moviepy.editor import ImageClip
         r1, g1, b1 = c1
         r2, g2, b2 = c2
         r = np.tile(np.linspace(r1, r2, h).reshape(h, 1), (1, w))
@@ -249,65 +280,70 @@ class AssetGenerator:
 
 # --- MODULE 3: VIDEO COMPOSITOR ---
 
-def render_video(scenario, audio_path, output_file):
+def render_video(scenario, audio_path, output_file, images, threads=4, renditions=None, workdir=None):
     print(f"🎬 Rendering: {scenario['option_a']} vs {scenario['option_b']}")
     assets = AssetGenerator()
+    from moviepy.editor import AudioFileClip, ImageClip
+    from compositor import Compositor, Layer
+    from glyph_atlas import text_rgba
+    import pipe_render
+    text_rgba = checkpoint.cached_text(text_rgba, workdir)
     
     audio_clip = AudioFileClip(audio_path)
     duration = audio_clip.duration + 5.0
+    audio_clip.close()
     W, H = 1080, 1920
 
-    def get_bg(text, side, fallback_colors, pos):
-        img_path = assets.get_ai_image(text, side)
+    # Backgrounds come from the images stage; a side without one gets its gradient
+    img_paths = (list(images) + [None, None])[:2]
+
+    def get_bg(img_path, fallback_colors, pos):
         if img_path and os.path.exists(img_path):
             clip = ImageClip(img_path).resize(newsize=(W, H//2))
-            darken = ColorClip(size=(W, H//2), color=(0,0,0)).set_opacity(0.55)
-            return CompositeVideoClip([clip, darken]).set_position(pos).set_duration(duration)
+            return [Layer.from_clip(clip, pos=pos),
+                    Layer.solid((W, H//2), (0, 0, 0), pos=pos, opacity=0.55)]
         else:
-            return assets.create_gradient(W, H//2, fallback_colors[0], fallback_colors[1])\
-                   .set_position(pos).set_duration(duration)
+            gradient = assets.create_gradient(W, H//2, fallback_colors[0], fallback_colors[1])
+            return [Layer.from_clip(gradient, pos=pos)]
 
-    bg_top = get_bg(scenario['option_a'], "top", [(200, 40, 40), (100, 20, 20)], ('center', 'top'))
-    bg_btm = get_bg(scenario['option_b'], "btm", [(40, 80, 200), (20, 40, 100)], ('center', 'bottom'))
+    bg_top = get_bg(img_paths[0], [(200, 40, 40), (100, 20, 20)], ('center', 'top'))
+    bg_btm = get_bg(img_paths[1], [(40, 80, 200), (20, 40, 100)], ('center', 'bottom'))
 
     def make_text(txt, size, pos, start=0):
-        s = TextClip(txt, font=FONT_PATH, fontsize=size, color='black', 
-                     method='caption', size=(900, None), align='center')
+        s = text_rgba(txt, size, color='black', max_width=900, align='center')
         
         if isinstance(pos[0], str) and pos[0] == 'center':
             shadow_pos = ('center', pos[1] + 4)
         else:
             shadow_pos = (pos[0] + 4, pos[1] + 4)
         
-        s = s.set_position(shadow_pos).set_opacity(0.6).set_start(start).set_duration(duration-start)
+        s = Layer(s, pos=shadow_pos, opacity=0.6, start=start)
         
-        m = TextClip(txt, font=FONT_PATH, fontsize=size, color='white', 
-                     method='caption', size=(900, None), align='center')
-        m = m.set_position(pos).set_start(start).set_duration(duration-start)
+        m = text_rgba(txt, size, color='white', max_width=900, align='center')
+        m = Layer(m, pos=pos, start=start)
         return s, m
 
     head_s, head_m = make_text("WOULD YOU RATHER?", 80, ('center', 130))
     opt_a_s, opt_a_m = make_text(scenario['option_a'], 70, ('center', 450))
     opt_b_s, opt_b_m = make_text(scenario['option_b'], 70, ('center', 1400))
 
-    vs_box = ColorClip(size=(220, 160), color=(20,20,20)).set_position('center').set_duration(duration)
-    vs_txt = TextClip("VS", font=FONT_PATH, fontsize=85, color='white').set_position('center').set_duration(duration)
+    vs_box = Layer.solid((220, 160), (20, 20, 20), pos='center')
+    vs_txt = Layer(text_rgba("VS", 85, color='white'), pos='center')
 
     timer_y = H // 2 + 80
-    timer_bg = ColorClip(size=(W, 20), color=(50,50,50)).set_position(('center', timer_y)).set_duration(duration)
+    timer_bg = Layer.solid((W, 20), (50, 50, 50), pos=('center', timer_y))
     
     choice_time = duration - 2.0
-    timer_fill = ColorClip(size=(W, 20), color=(255, 200, 0))
-    timer_fill = timer_fill.set_position(
-        lambda t: (-int(W * (t/choice_time)), timer_y) if t < choice_time else (-W, timer_y)
-    ).set_duration(duration)
+    timer_fill = Layer.solid((W, 20), (255, 200, 0),
+        pos=lambda t: (-int(W * (t/choice_time)), timer_y) if t < choice_time else (-W, timer_y))
 
     reveal_start = duration - 2.0
     stat_a_s, stat_a_m = make_text(f"{scenario['stats'][0]}%", 140, ('center', 700), start=reveal_start)
     stat_b_s, stat_b_m = make_text(f"{scenario['stats'][1]}%", 140, ('center', 1650), start=reveal_start)
 
-    final = CompositeVideoClip([
-        bg_top, bg_btm,
+    # Layers are premultiplied once; every frame blends into one reused buffer
+    compositor = Compositor((W, H), [
+        *bg_top, *bg_btm,
         head_s, head_m,
         vs_box, vs_txt,
         opt_a_s, opt_a_m,
@@ -315,78 +351,29 @@ def render_video(scenario, audio_path, output_file):
         timer_bg, timer_fill,
         stat_a_s, stat_a_m,
         stat_b_s, stat_b_m
-    ])
+    ], duration)
     
-    final = final.set_audio(audio_clip)
-    final.write_videofile(output_file, fps=24, codec='libx264', audio_codec='aac', threads=4, preset='fast')
+    return pipe_render.render(compositor, output_file, audio_path=audio_path, fps=24, threads=threads,
+                              preset='fast', renditions=renditions, bitexact=seeds.enabled(),
+                              segment_dir=os.path.join(workdir, "segments") if workdir else None,
+                              segment_key=checkpoint.inputs_key(scenario, audio_path, *img_paths))
 
 # --- MODULE 4: AUDIO GENERATION (FIXED KOKORO) ---
-def generate_audio(text, filename):
-    """Generate audio with Kokoro - handle nested sequences."""
+def generate_audio(segments, filename):
+    """Generate audio with Kokoro, reusing cached phrases (boilerplate is free after the first run)."""
+    if isinstance(segments, str):
+        segments = [segments]
     try:
-        import kokoro
-        import numpy as np
-        import torch
-        from scipy.io import wavfile
-        import subprocess
-        import os
+        import audio_fx
+        import tts_engine
         
         print("🎤 Generating audio with Kokoro TTS...")
         
-        pipeline = kokoro.KPipeline(lang_code="en-us", repo_id='hexgrad/Kokoro-82M')
-        result = pipeline(text, voice="af_bella")
-        
-        # Convert generator to list immediately
-        chunks_list = list(result)
-        
-        # NUCLEAR OPTION: Recursively extract all float values
-        all_values = []
-        
-        def extract_floats(obj):
-            """Extract all float values from nested structure."""
-            if isinstance(obj, torch.Tensor):
-                all_values.extend(obj.detach().cpu().numpy().flatten().tolist())
-            elif isinstance(obj, np.ndarray):
-                all_values.extend(obj.flatten().tolist())
-            elif isinstance(obj, (list, tuple)):
-                for item in obj:
-                    extract_floats(item)
-            elif isinstance(obj, (int, float)):
-                all_values.append(float(obj))
-        
-        # Extract from all chunks
-        for chunk in chunks_list:
-            extract_floats(chunk)
-        
-        if len(all_values) == 0:
-            raise ValueError("No audio samples extracted")
-        
-        print(f"  ✓ Extracted {len(all_values)} audio samples")
-        
-        # Convert to numpy array
-        audio_array = np.array(all_values, dtype=np.float32)
-        
-        # Normalize
-        max_val = np.abs(audio_array).max()
-        if max_val > 0:
-            audio_array = audio_array / max_val
-        audio_array = np.clip(audio_array, -1.0, 1.0)
-        
-        # Convert to 16-bit
-        audio_int16 = (audio_array * 32767).astype(np.int16)
-        
-        # Save WAV
-        wav_temp = filename.replace('.mp3', '_kokoro.wav')
-        wavfile.write(wav_temp, 24000, audio_int16)
-        
-        # Convert to MP3
-        subprocess.run([
-            'ffmpeg', '-y', '-loglevel', 'error',
-            '-i', wav_temp, '-codec:a', 'libmp3lame',
-            '-qscale:a', '2', filename
-        ], check=True, capture_output=True)
+        audio_array = tts_engine.speak(segments, voice=WYR_VOICE, speed=WYR_SPEED)
+        print(f"  ✓ Extracted {len(audio_array)} audio samples")
         
-        os.remove(wav_temp)
+        # Level it in memory and write straight to WAV
+        audio_fx.write_wav(filename, audio_fx.apply_chain(audio_array, "wyr"))
         
         print(f"✅ Kokoro audio saved: {filename}")
         return filename
@@ -396,28 +383,37 @@ def generate_audio(text, filename):
         print("    🔄 Using gTTS...")
         
         from gtts import gTTS
-        tts = gTTS(text=text, lang='en', slow=False)
+        filename = os.path.splitext(filename)[0] + '.mp3'
+        tts = gTTS(text=" ".join(segments), lang='en', slow=False)
         tts.save(filename)
         print(f"✅ gTTS audio saved: {filename}")
         return filename
+
+def build_script(data):
+    """Split the WYR script so the fixed intro/outro are cached phrases."""
+    return [WYR_INTRO, f"{data['option_a']}, or {data['option_b']}?", WYR_OUTRO]
+
+def warm_tts_cache():
+    import tts_engine
+    tts_engine.warm([[WYR_INTRO, WYR_OUTRO]], voice=WYR_VOICE, speed=WYR_SPEED)
             
 # --- EXECUTION ---
 
-def main():
-    mgr = AutoContentManager()
-    data = mgr.get_content()
-    
-    print(f"✅ LOCKED: {data['option_a']} vs {data['option_b']}")
-    
-    audio_script = f"Would you rather {data['option_a']}, or {data['option_b']}? Make your choice."
-    audio_path = os.path.join(OUTPUT_DIR, "voice.mp3")
-    generate_audio(audio_script, audio_path)
-    
+def voice_over(data, filename=None):
+    return generate_audio(build_script(data), filename or os.path.join(OUTPUT_DIR, "voice.wav"))
+
+def prefetch_assets(data):
+    """Download the backgrounds. Returns [top, bottom] image paths (None where every provider failed)."""
+    assets = AssetGenerator()
+    return [assets.get_ai_image(data['option_a'], "top"),
+            assets.get_ai_image(data['option_b'], "btm")]
+
+def render(data, audio_path, images, threads=4, renditions=None, workdir=None):
+    """Render every requested rendition in one pass from the prefetched images. Returns the video paths."""
     video_path = os.path.join(OUTPUT_DIR, f"wyr_{data['id']}.mp4")
-    render_video(data, audio_path, video_path)
-    
-    mgr.save_history(data['id'])
-    
+    return render_video(data, audio_path, video_path, images, threads=threads, renditions=renditions, workdir=workdir)
+
+def cleanup(audio_path):
     if os.path.exists(audio_path): 
         os.remove(audio_path)
     
@@ -425,8 +421,56 @@ def main():
         file_path = os.path.join(CACHE_DIR, f)
         if os.path.isfile(file_path):
             os.remove(file_path)
-    
+
+def main(renditions=None):
+    setup_dirs()
+    mgr = AutoContentManager()
+    run = checkpoint.Run(FORMAT)
+    data = run.stage("content", mgr.get_content)
+    print(f"✅ LOCKED: {data['option_a']} vs {data['option_b']}")
+    images = run.stage("images", lambda: prefetch_assets(data), files=True)
+    audio_path = run.stage("audio", lambda: voice_over(data), files=True)
+    run.stage("render", lambda: render(data, audio_path, images, renditions=renditions, workdir=run.dir),
+              files=True, key=renditions)
+    mgr.save_history(data['id'])
+    # Intermediates go only once the history is written
+    cleanup(audio_path)
+    run.finish()
     print("✨ DONE. Video ready in output/")
 
+def list_candidates():
+    mgr = AutoContentManager()
+    for post in mgr.iter_candidates():
+        print(f"  {post['id']}: {post['option_a']} | {post['option_b']}")
+
+def prefetch():
+    """Pick today's scenario and download its images without rendering."""
+    setup_dirs()
+    prefetch_assets(AutoContentManager().get_content())
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Would You Rather video generator")
+    parser.add_argument("command", nargs="?", default="render",
+                        choices=["render", "list", "validate-history", "prefetch", "warm-tts"])
+    parser.add_argument("--renditions", nargs="+", metavar="NAME",
+                        help="outputs to encode from one pass: shorts 720p square (default: shorts)")
+    parser.add_argument("--deterministic", action="store_true",
+                        help="seed all randomness from the content so reruns are byte-identical")
+    args = parser.parse_args(argv)
+    if args.deterministic:
+        seeds.enable()
+
+    if args.command == "render":
+        main(args.renditions)
+    elif args.command == "list":
+        list_candidates()
+    elif args.command == "validate-history":
+        return 0 if AutoContentManager().validate_history() else 1
+    elif args.command == "prefetch":
+        prefetch()
+    elif args.command == "warm-tts":
+        warm_tts_cache()
+    return 0
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(cli())
@@ -0,0 +1,80 @@
+"""
+Startup benchmark for the generator entry points.
+
+Runs each script's `--help` under `python -X importtime` and reports wall
+time, total import time and the heaviest top-level imports. Non-rendering
+commands should stay well under a second; use --budget to fail on regressions.
+
+    python .github/scripts/bench_startup.py --json output/bench/startup.json --budget 1.0
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ENTRY_POINTS = ["auto_generate.py", "generate_scary_short.py", "generate_weird_fact.py", "run_all.py"]
+
+def parse_importtime(stderr):
+    """Return [(module, cumulative_us)] for the top-level imports in -X importtime output."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if name.startswith(" ") and not name.startswith("  "):
+            imports.append((name.strip(), int(cumulative)))
+    return imports
+
+def bench(script, runs=3):
+    path = os.path.join(SCRIPTS_DIR, script)
+    best_wall = None
+    imports = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", path, "--help"],
+                              capture_output=True, text=True)
+        wall = time.perf_counter() - start
+        if proc.returncode != 0:
+            raise RuntimeError(f"{script} --help exited {proc.returncode}: {proc.stderr[-300:]}")
+        if best_wall is None or wall < best_wall:
+            best_wall = wall
+            imports = parse_importtime(proc.stderr)
+
+    imports.sort(key=lambda item: item[1], reverse=True)
+    return {
+        "script": script,
+        "wall_s": round(best_wall, 3),
+        "import_s": round(sum(us for _, us in imports) / 1e6, 3),
+        "top_imports": [{"module": m, "ms": round(us / 1000, 1)} for m, us in imports[:8]],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark generator startup time")
+    parser.add_argument("--runs", type=int, default=3, help="best-of N runs per entry point")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--budget", type=float, help="fail if any entry point takes longer (seconds)")
+    args = parser.parse_args(argv)
+
+    results = [bench(script, args.runs) for script in ENTRY_POINTS]
+
+    for r in results:
+        heaviest = ", ".join(f"{i['module']} {i['ms']:.0f}ms" for i in r["top_imports"][:3])
+        print(f"⏱️ {r['script']:<26} wall {r['wall_s']:.3f}s  imports {r['import_s']:.3f}s  ({heaviest})")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+
+    if args.budget is not None:
+        slow = [r for r in results if r["wall_s"] > args.budget]
+        for r in slow:
+            print(f"❌ {r['script']} took {r['wall_s']:.3f}s (budget {args.budget:.3f}s)")
+        return 1 if slow else 0
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
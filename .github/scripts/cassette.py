@@ -0,0 +1,214 @@
+"""
+Record/replay HTTP cassette for offline, repeatable runs.
+
+Hooks requests' HTTPAdapter.send, so it sits under every outbound call:
+the shared net session (pullpush, Pollinations, Unsplash, Pexels, Picsum)
+and gTTS's own session alike. Enabled from the environment when net is
+imported:
+
+    HTTP_CASSETTE=record  python .github/scripts/run_all.py
+    HTTP_CASSETTE=replay  HTTP_CASSETTE_LATENCY=1.0 \\
+        HTTP_CASSETTE_FAIL="pollinations.ai=1.0" python .github/scripts/run_all.py
+
+HTTP_CASSETTE_PATH   archive file (default .cache/http/cassette.zip)
+HTTP_CASSETTE_LATENCY  replay: multiply recorded latency by this (default 0)
+HTTP_CASSETTE_FAIL   replay: "host-substring=probability,..." to inject failures
+HTTP_CASSETTE_SEED   replay: seed for the failure injection (default 0)
+
+The archive is a single deflated zip: index.json maps request fingerprints
+to recorded responses (status, headers, latency, body digest) and each
+distinct body is stored once under bodies/<sha256>. Re-recording a request
+replaces its old responses; everything else in the archive is kept.
+Fingerprints ignore random cache-busting params (seed, sig, random) so a
+replay matches the recording even when those differ. Repeated requests to
+the same fingerprint replay in recorded order.
+
+    python .github/scripts/cassette.py list [--path ...]
+"""
+import os
+import json
+import time
+import random
+import atexit
+import hashlib
+import zipfile
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+BASE_DIR = os.getcwd()
+DEFAULT_PATH = os.path.join(BASE_DIR, ".cache", "http", "cassette.zip")
+IGNORED_PARAMS = {"seed", "sig", "random"}
+KEPT_HEADERS = {"content-type", "content-length", "etag", "last-modified", "cache-control", "location"}
+
+_installed = None
+
+def fingerprint(method, url, body=None):
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in IGNORED_PARAMS)
+    key = f"{method.upper()} {parts.scheme}://{parts.netloc}{parts.path}?{urlencode(query)}"
+    if body:
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        key += f" #{hashlib.sha256(body).hexdigest()[:16]}"
+    return key
+
+def _parse_failures(spec):
+    failures = []
+    for item in filter(None, (s.strip() for s in (spec or "").split(","))):
+        host, _, prob = item.partition("=")
+        failures.append((host, float(prob or 1.0)))
+    return failures
+
+class Cassette:
+    def __init__(self, path=DEFAULT_PATH, mode="replay", latency=0.0, failures=None, seed=0):
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.failures = failures or []
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        # A recording session starts clean and replaces what it re-records
+        self.index, self.bodies = ({}, {}) if mode == "record" else self._load()
+        self._cursor = {}
+        self._dirty = False
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}, {}
+        with zipfile.ZipFile(self.path) as z:
+            index = json.loads(z.read("index.json"))
+            bodies = {name[len("bodies/"):]: z.read(name) for name in z.namelist() if name.startswith("bodies/")}
+        return index, bodies
+
+    def save(self):
+        """Merge with whatever is on disk (other processes may have recorded too) and write."""
+        with self.lock:
+            if not self._dirty:
+                return
+            index, bodies = self._load()
+            index.update(self.index)
+            bodies.update(self.bodies)
+            used = {e["body"] for entries in index.values() for e in entries}
+
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED) as z:
+                z.writestr("index.json", json.dumps(index, indent=1, sort_keys=True))
+                for digest in sorted(used):
+                    z.writestr(f"bodies/{digest}", bodies[digest])
+            os.replace(tmp, self.path)
+            self._dirty = False
+            print(f"📼 Cassette saved: {sum(len(v) for v in index.values())} responses -> {self.path}")
+
+    def record(self, request, response, latency):
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        entry = {
+            "url": request.url,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() in KEPT_HEADERS},
+            "latency": round(latency, 3),
+            "body": digest,
+        }
+        with self.lock:
+            self.bodies[digest] = body
+            self.index.setdefault(fingerprint(request.method, request.url, request.body), []).append(entry)
+            self._dirty = True
+
+    def _next_entry(self, key):
+        with self.lock:
+            entries = self.index.get(key)
+            if not entries:
+                return None
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = i + 1
+            return entries[min(i, len(entries) - 1)]
+
+    def replay(self, request, timeout=None):
+        import requests
+        from requests.structures import CaseInsensitiveDict
+        from requests.utils import get_encoding_from_headers
+
+        host = urlsplit(request.url).netloc
+        for pattern, prob in self.failures:
+            if pattern in host and self.rng.random() < prob:
+                raise requests.ConnectionError(f"cassette: injected failure for {host}", request=request)
+
+        entry = self._next_entry(fingerprint(request.method, request.url, request.body))
+        if entry is None:
+            raise requests.ConnectionError(f"cassette: no recording for {request.method} {request.url}",
+                                           request=request)
+
+        delay = entry["latency"] * self.latency
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+        if read_timeout is not None and delay > read_timeout:
+            time.sleep(read_timeout)
+            raise requests.ReadTimeout(f"cassette: simulated {delay:.1f}s > timeout {read_timeout}s",
+                                       request=request)
+        if delay:
+            time.sleep(delay)
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = entry["reason"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response._content = self.bodies[entry["body"]]
+        response._content_consumed = True
+        return response
+
+def install(cassette):
+    """Route every requests HTTPAdapter through `cassette` (idempotent)."""
+    global _installed
+    from requests.adapters import HTTPAdapter
+    if _installed is not None:
+        return _installed
+    original_send = HTTPAdapter.send
+
+    def send(adapter, request, **kwargs):
+        if cassette.mode == "replay":
+            return cassette.replay(request, kwargs.get("timeout"))
+        start = time.perf_counter()
+        response = original_send(adapter, request, **kwargs)
+        cassette.record(request, response, time.perf_counter() - start)
+        return response
+
+    HTTPAdapter.send = send
+    if cassette.mode == "record":
+        atexit.register(cassette.save)
+    _installed = cassette
+    print(f"📼 HTTP cassette: {cassette.mode} ({cassette.path})")
+    return cassette
+
+def install_from_env():
+    mode = os.environ.get("HTTP_CASSETTE", "").lower()
+    if mode not in ("record", "replay"):
+        return None
+    return install(Cassette(
+        path=os.environ.get("HTTP_CASSETTE_PATH", DEFAULT_PATH),
+        mode=mode,
+        latency=float(os.environ.get("HTTP_CASSETTE_LATENCY", "0")),
+        failures=_parse_failures(os.environ.get("HTTP_CASSETTE_FAIL")),
+        seed=int(os.environ.get("HTTP_CASSETTE_SEED", "0")),
+    ))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect a recorded HTTP cassette")
+    parser.add_argument("command", choices=["list"])
+    parser.add_argument("--path", default=os.environ.get("HTTP_CASSETTE_PATH", DEFAULT_PATH))
+    args = parser.parse_args(argv)
+
+    c = Cassette(args.path)
+    for key, entries in sorted(c.index.items()):
+        for e in entries:
+            size = len(c.bodies.get(e["body"], b""))
+            print(f"  {e['status']} {e['latency']:>6.2f}s {size:>8}B  {key[:110]}")
+    print(f"📼 {sum(len(v) for v in c.index.values())} responses, {len(c.bodies)} bodies")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
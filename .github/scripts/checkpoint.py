@@ -0,0 +1,158 @@
+"""
+Per-run work directory with a stage manifest, so a failed or preempted run
+can resume where it stopped instead of redoing scrape, TTS, downloads and
+the whole render.
+
+    run = checkpoint.Run("horror")
+    data = run.stage("content", mgr.get_content)
+    audio = run.stage("audio", lambda: voice_over(data), files=True)
+    ...
+    mgr.save_history(data['id'])
+    run.finish()   # only once history is written
+
+Each stage's return value is stored in manifest.json. With files=True the
+value is a path (or list of paths); the files are also kept in the work dir
+with their sha256, and restored to their original location on resume, so
+the usual cache checks downstream (image_check, prefetched images) hit.
+Rendered video segments and rasterized text live under the same directory
+(see pipe_render.render(segment_dir=..., segment_key=inputs_key(...)) and
+cached_text()).
+
+Runs are keyed by RUN_KEY, else GITHUB_RUN_ID (stable across re-runs of a
+workflow), else today's UTC date.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import datetime
+
+BASE_DIR = os.getcwd()
+RUNS_DIR = os.path.join(BASE_DIR, ".cache", "runs")
+
+def run_key():
+    return (os.environ.get("RUN_KEY") or os.environ.get("GITHUB_RUN_ID")
+            or datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d"))
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _place(src, dst):
+    """Hard-link when possible (same filesystem), else copy."""
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+class Run:
+    def __init__(self, fmt, key=None):
+        self.fmt = fmt
+        self.key = key or run_key()
+        self.dir = os.path.join(RUNS_DIR, self.key, fmt)
+        self.files_dir = os.path.join(self.dir, "files")
+        self.manifest_path = os.path.join(self.dir, "manifest.json")
+        os.makedirs(self.files_dir, exist_ok=True)
+
+        self.manifest = {"format": fmt, "run_key": self.key, "created": round(time.time()), "stages": {}}
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path) as f:
+                    self.manifest = json.load(f)
+                done = ", ".join(self.manifest["stages"]) or "nothing"
+                print(f"♻️ [{fmt}] Resuming run {self.key} (done: {done})")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ [{fmt}] Unreadable manifest, starting over: {e}")
+
+    def _save(self):
+        tmp = f"{self.manifest_path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    # --- stages ---
+
+    def _restore(self, entry):
+        """Put a files stage's outputs back in place. False if anything is missing."""
+        for item in entry["files"]:
+            stored = os.path.join(self.files_dir, item["stored"])
+            if not os.path.exists(stored) or file_sha256(stored) != item["sha256"]:
+                return False
+        for item in entry["files"]:
+            if not os.path.exists(item["path"]) or file_sha256(item["path"]) != item["sha256"]:
+                os.makedirs(os.path.dirname(item["path"]) or ".", exist_ok=True)
+                _place(os.path.join(self.files_dir, item["stored"]), item["path"])
+        return True
+
+    def done(self, name, key=None):
+        entry = self.manifest["stages"].get(name)
+        if entry is None or entry.get("key") != key:
+            return False
+        return "files" not in entry or self._restore(entry)
+
+    def value(self, name):
+        return self.manifest["stages"][name]["value"]
+
+    def record(self, name, value, files=False, key=None, seconds=None):
+        entry = {"value": value, "key": key, "done_at": round(time.time()), "seconds": seconds}
+        if files:
+            paths = [value] if isinstance(value, str) else [p for p in (value or []) if p]
+            entry["files"] = []
+            for path in paths:
+                stored = f"{name}-{len(entry['files'])}-{os.path.basename(path)}"
+                _place(path, os.path.join(self.files_dir, stored))
+                entry["files"].append({"path": path, "stored": stored, "sha256": file_sha256(path)})
+        self.manifest["stages"][name] = entry
+        self._save()
+        return value
+
+    def stage(self, name, fn, files=False, key=None):
+        """Return the stored result of stage `name`, or run fn() and store it."""
+        if self.done(name, key):
+            print(f"⏭️ [{self.fmt}] {name}: done in an earlier attempt")
+            return self.value(name)
+        start = time.perf_counter()
+        value = fn()
+        return self.record(name, value, files=files, key=key, seconds=round(time.perf_counter() - start, 2))
+
+    def finish(self):
+        """Drop the work dir. Call only after the history has been written."""
+        shutil.rmtree(self.dir, ignore_errors=True)
+        parent = os.path.dirname(self.dir)
+        if os.path.isdir(parent) and not os.listdir(parent):
+            os.rmdir(parent)
+
+def inputs_key(data, *paths):
+    """Digest of a scenario and the files a render reads (None for a missing one),
+    so rendered segments are only reused for exactly the same inputs."""
+    h = hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8'))
+    for path in paths:
+        h.update(file_sha256(path).encode() if path and os.path.exists(path) else b"none")
+    return h.hexdigest()[:16]
+
+# --- rasterized text ---
+
+def cached_text(text_rgba, workdir):
+    """Wrap glyph_atlas.text_rgba so each caption is rasterized once per run (stored as .npy)."""
+    if not workdir:
+        return text_rgba
+    import numpy as np
+    text_dir = os.path.join(workdir, "text")
+    os.makedirs(text_dir, exist_ok=True)
+
+    def cached(text, size, **kwargs):
+        key = hashlib.sha256(json.dumps([text, size, kwargs], sort_keys=True).encode('utf-8')).hexdigest()[:20]
+        path = os.path.join(text_dir, f"{key}.npy")
+        if os.path.exists(path):
+            return np.load(path)
+        rgba = text_rgba(text, size, **kwargs)
+        np.save(f"{path}.tmp.npy", rgba)
+        os.replace(f"{path}.tmp.npy", path)
+        return rgba
+    return cached
@@ -0,0 +1,149 @@
+"""
+Integer-only frame compositor.
+
+Layers are stored once as premultiplied RGBA (uint8 colour, uint16 inverse
+alpha) cropped to their own bounding box. Every frame is blended into one
+preallocated uint8 buffer, touching only each visible layer's box:
+
+    out = src_premultiplied + round(dst * (255 - alpha) / 255)
+
+Leading layers that never move or change are flattened into a base frame up
+front, so a typical video only pays for its animated and timed layers.
+Opaque full-frame layers that draw themselves (anything with a
+`render_into(dst, t)` method, e.g. ken_burns.KenBurnsLayer) can be mixed in.
+`Compositor.make_frame` is a drop-in frame source for MoviePy's VideoClip
+(and therefore write_videofile) or for writing raw frames to an ffmpeg pipe.
+"""
+import numpy as np
+
+# --- LAYERS ---
+
+class Layer:
+    def __init__(self, rgba, pos=(0, 0), start=0.0, end=None, opacity=1.0):
+        """
+        rgba: HxWx4 uint8 with straight alpha (HxWx3 is treated as opaque).
+        pos: MoviePy-style position, or a callable t -> (x, y).
+        """
+        rgba = np.asarray(rgba)
+        if rgba.shape[2] == 3:
+            alpha = np.full(rgba.shape[:2] + (1,), 255, dtype=np.uint16)
+        else:
+            alpha = rgba[:, :, 3:4].astype(np.uint16)
+        if opacity < 1.0:
+            alpha = (alpha * int(round(opacity * 255)) + 127) // 255
+
+        self.h, self.w = rgba.shape[:2]
+        self.color = ((rgba[:, :, :3].astype(np.uint16) * alpha + 127) // 255).astype(np.uint8)
+        self.inv_alpha = (255 - alpha).astype(np.uint16)
+        self.opaque = bool((alpha == 255).all())
+        self.pos = pos
+        self.start = start
+        self.end = end
+
+        # Scratch space for the blend, reused on every frame
+        self._acc = np.empty((self.h, self.w, 3), dtype=np.uint16)
+        self._tmp = np.empty((self.h, self.w, 3), dtype=np.uint16)
+
+    @classmethod
+    def solid(cls, size, color, **kwargs):
+        w, h = size
+        rgb = np.empty((h, w, 3), dtype=np.uint8)
+        rgb[:] = color
+        return cls(rgb, **kwargs)
+
+    @classmethod
+    def from_clip(cls, clip, **kwargs):
+        """Rasterize a static MoviePy clip (TextClip, ImageClip, ...) once."""
+        rgb = clip.get_frame(0).astype(np.uint8)
+        if clip.mask is not None:
+            alpha = (np.clip(clip.mask.get_frame(0), 0, 1) * 255 + 0.5).astype(np.uint8)
+            rgb = np.dstack([rgb, alpha])
+        return cls(rgb, **kwargs)
+
+    @property
+    def is_static(self):
+        return not callable(self.pos)
+
+    def visible(self, t):
+        return t >= self.start and (self.end is None or t < self.end)
+
+    def always_visible(self, duration):
+        return self.start <= 0 and (self.end is None or self.end >= duration)
+
+def resolve_position(pos, size, canvas):
+    """Turn a MoviePy-style position ('center', ('center', 400), (x, y)...) into pixels."""
+    w, h = size
+    W, H = canvas
+    if isinstance(pos, str):
+        pos = (pos, pos)
+    x, y = pos
+    if isinstance(x, str):
+        x = {"left": 0, "center": (W - w) // 2, "right": W - w}[x]
+    if isinstance(y, str):
+        y = {"top": 0, "center": (H - h) // 2, "bottom": H - h}[y]
+    return int(x), int(y)
+
+# --- COMPOSITOR ---
+
+class Compositor:
+    def __init__(self, size, layers, duration, background=(0, 0, 0)):
+        self.size = size
+        self.duration = duration
+        W, H = size
+        self.frame = np.empty((H, W, 3), dtype=np.uint8)
+
+        # Flatten the always-on, static layers at the bottom into a base frame
+        self.base = np.empty((H, W, 3), dtype=np.uint8)
+        self.base[:] = background
+        layers = list(layers)
+        while layers and layers[0].is_static and layers[0].always_visible(duration):
+            self._blend(self.base, layers.pop(0), 0)
+        self.layers = layers
+
+    def _blend(self, dst, layer, t):
+        if hasattr(layer, 'render_into'):
+            # Full-frame procedural layers (ken_burns.KenBurnsLayer) draw themselves
+            layer.render_into(dst, t)
+            return
+        pos = layer.pos(t) if callable(layer.pos) else layer.pos
+        x, y = resolve_position(pos, (layer.w, layer.h), self.size)
+        W, H = self.size
+
+        # Clip the layer box against the canvas
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + layer.w, W), min(y + layer.h, H)
+        if x0 >= x1 or y0 >= y1:
+            return
+        sx, sy = x0 - x, y0 - y
+        sw, sh = x1 - x0, y1 - y0
+
+        region = dst[y0:y1, x0:x1]
+        color = layer.color[sy:sy + sh, sx:sx + sw]
+        if layer.opaque:
+            region[...] = color
+            return
+
+        acc = layer._acc[:sh, :sw]
+        tmp = layer._tmp[:sh, :sw]
+        np.multiply(region, layer.inv_alpha[sy:sy + sh, sx:sx + sw], out=acc)
+        # Exact round(acc / 255) in 16-bit: (v + (v >> 8)) >> 8 with v = acc + 128
+        acc += 128
+        np.right_shift(acc, 8, out=tmp)
+        acc += tmp
+        acc >>= 8
+        acc += color
+        np.copyto(region, acc, casting='unsafe')
+
+    def make_frame(self, t, out=None):
+        """Composite the frame at time t into `out` (or the shared buffer) and return it."""
+        frame = self.frame if out is None else out
+        np.copyto(frame, self.base)
+        for layer in self.layers:
+            if layer.visible(t):
+                self._blend(frame, layer, t)
+        return frame
+
+    def to_videoclip(self):
+        """Wrap as a MoviePy VideoClip so write_videofile can pull frames from it."""
+        from moviepy.editor import VideoClip
+        return VideoClip(self.make_frame, duration=self.duration)
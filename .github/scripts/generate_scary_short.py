@@ -1,16 +1,19 @@
 import os
 import json
-import random
+import hashlib
+import argparse
 import requests
-import subprocess
-import time
-import numpy as np
-from PIL import Image
-from moviepy.editor import *
-from moviepy.config import change_settings
-
+import net
+import image_check
+import provider_health
+import search_cache
+import image_pool
+import seeds
+import checkpoint
+import history
 
-# Add this right after your imports, before any other code:
+# MoviePy and the TTS stack are imported where they are used so that
+# commands which never render (list, validate-history, prefetch) start fast.
 
 # Fix PIL.Image.ANTIALIAS deprecation for MoviePy compatibility
 from PIL import Image
@@ -21,19 +24,26 @@ if not hasattr(Image, 'BILINEAR'):
 
     
 # --- CONFIG ---
-change_settings({"IMAGEMAGICK_BINARY": "/usr/bin/convert"})
+FORMAT = "horror"  # key for content-seeded randomness (seeds.py)
+POLLINATIONS_BUDGET = 12  # seconds before falling back to a pooled image (image_pool.py)
 BASE_DIR = os.getcwd()
 DATA_DIR = os.path.join(BASE_DIR, "data")
 OUTPUT_DIR = os.path.join(BASE_DIR, "output")
 CACHE_DIR = os.path.join(OUTPUT_DIR, "cache")
-ASSETS_DIR = os.path.join(BASE_DIR, ".github/assets")
-FONT_PATH = os.path.join(ASSETS_DIR, "fonts/Montserrat-Bold.ttf")
 
-if not os.path.exists(FONT_PATH): 
-    FONT_PATH = "DejaVu-Sans-Bold"
+def setup_dirs():
+    for d in [DATA_DIR, OUTPUT_DIR, CACHE_DIR]: 
+        os.makedirs(d, exist_ok=True)
+
+HORROR_VOICE = "am_adam"
+HORROR_SPEED = 0.95
 
-for d in [DATA_DIR, OUTPUT_DIR, CACHE_DIR]: 
-    os.makedirs(d, exist_ok=True)
+BACKUP_STORIES = [
+    ("I heard my mom calling me into the kitchen.", "As I ran down the hall, she whispered from the closet, 'Don't go, I heard it too.'"),
+    ("I woke up to hear knocking on glass.", "At first, I thought it was the window until I heard it come from the mirror again."),
+    ("The last man on Earth sat alone in a room.", "There was a knock on the door."),
+    ("My daughter won't stop crying and screaming in the middle of the night.", "I visit her grave and ask her to stop, but it doesn't help."),
+]
 
 # --- MODULE 1: CONTENT ---
 
@@ -55,7 +65,8 @@ class HorrorContentManager:
         with open(self.history_file, 'w') as f: 
             json.dump(self.history, f)
 
-    def get_content(self):
+    def iter_candidates(self):
+        """Yield unseen, SFW stories from the Pushshift archive, best first."""
         try:
             print("👻 Scraping r/TwoSentenceHorror...")
             
@@ -68,40 +79,38 @@ class HorrorContentManager:
                 'fields': 'id,title,selftext,over_18'
             }
             
-            r = requests.get(url, params=params, timeout=15)
-            if r.status_code == 200:
-                data = r.json()
-                
-                for post in data.get('data', []):
-                    pid = post.get('id', '')
-                    over_18 = post.get('over_18', False)
-                    
-                    if pid in self.history or over_18:
-                        continue
-                    
-                    setup = post.get('title', '')
-                    punchline = post.get('selftext', '')
-                    
-                    if setup and punchline:
-                        print(f"✅ Found from Pushshift: {setup[:50]}...")
-                        return {
-                            "id": pid,
-                            "setup": setup,
-                            "punchline": punchline
-                        }
+            for story in search_cache.search(url, params, self._parse_post, self.history):
+                print(f"✅ Found from Pushshift: {story['setup'][:50]}...")
+                yield story
         except Exception as e:
             print(f"⚠️ Scrape failed: {e}")
+
+    def _parse_post(self, post):
+        """One raw pullpush post -> story, or None if it is NSFW or incomplete."""
+        setup = post.get('title', '')
+        punchline = post.get('selftext', '')
+        if post.get('over_18', False) or not (setup and punchline):
+            return None
+        return {
+            "id": post.get('id', ''),
+            "setup": setup,
+            "punchline": punchline
+        }
+
+    def validate_history(self):
+        """Report problems in the history file. Returns True when it is clean."""
+        return history.validate(self.history_file)
+
+    def get_content(self):
+        story = next(self.iter_candidates(), None)
+        if story:
+            return story
         
-        backups = [
-            ("I heard my mom calling me into the kitchen.", "As I ran down the hall, she whispered from the closet, 'Don't go, I heard it too.'"),
-            ("I woke up to hear knocking on glass.", "At first, I thought it was the window until I heard it come from the mirror again."),
-            ("The last man on Earth sat alone in a room.", "There was a knock on the door."),
-            ("My daughter won't stop crying and screaming in the middle of the night.", "I visit her grave and ask her to stop, but it doesn't help."),
-        ]
-        
-        setup, punchline = random.choice(backups)
+        backups = [(seeds.stable_id("backup", setup), setup, punchline) for setup, punchline in BACKUP_STORIES]
+        unused = [b for b in backups if b[0] not in self.history] or backups
+        pid, setup, punchline = seeds.rng(FORMAT, f"backup-{len(self.history)}").choice(unused)
         return {
-            "id": f"backup_{random.randint(1000,9999)}",
+            "id": pid,
             "setup": setup,
             "punchline": punchline
         }
@@ -110,25 +119,47 @@ class HorrorContentManager:
 
 class HorrorAssetGen:
     def get_creepy_image(self, prompt):
-        filename = os.path.join(CACHE_DIR, f"scary_{abs(hash(prompt))}.jpg")
+        filename = os.path.join(CACHE_DIR, f"scary_{hashlib.md5(prompt.encode('utf-8')).hexdigest()[:16]}.jpg")
         width, height = 1080, 1920
         
+        if image_check.is_valid(filename, (width, height), video_format=FORMAT):
+            print("♻️ Using prefetched horror image")
+            return filename
+        
         topic = "abstract"
         
         providers = [
             ("Pollinations", lambda: self._generate_pollinations(prompt, filename, width, height)),
+            ("Pool", lambda: image_pool.take("horror", (width, height), filename)),
             ("Unsplash", lambda: self._generate_unsplash(topic, filename, width, height)),
             ("Pexels", lambda: self._generate_pexels(topic, filename, width, height)),
             ("Picsum", lambda: self._generate_picsum(filename, width, height))
         ]
         
-        for provider_name, provider_func in providers:
+        # Pollinations is the only prompt-matched source; a prefetched topic
+        # image comes next, then the stock fallbacks fastest-first by their
+        # recorded latency and success rate
+        for provider_name, provider_func in provider_health.order(providers, pinned=["Pollinations", "Pool"]):
             try:
                 print(f"🎨 Trying {provider_name} for horror image...")
-                result = provider_func()
-                if result and os.path.exists(result) and os.path.getsize(result) > 5000:
-                    print(f"✅ {provider_name} succeeded")
-                    return result
+                if provider_name == "Pool":
+                    # Local and instant: not a provider to keep health stats on
+                    result = provider_func()
+                    if not result:
+                        raise Exception("pool empty")
+                else:
+                    with provider_health.track(provider_name):
+                        result = provider_func()
+                # Checked outside track(): a poor image is not an outage
+                image_check.validate(result, (width, height), video_format=FORMAT)
+                print(f"✅ {provider_name} succeeded")
+                return result
+            except provider_health.CircuitOpen as e:
+                print(f"⏭️ Skipping {provider_name}: {e}")
+            except image_check.ImageRejected as e:
+                print(f"🚫 {provider_name} image rejected: {e.reason}")
+                if os.path.exists(filename):
+                    os.remove(filename)
             except Exception as e:
                 print(f"⚠️ {provider_name} failed: {str(e)[:50]}")
                 continue
@@ -137,9 +168,10 @@ class HorrorAssetGen:
         return None
     
     def _generate_pollinations(self, prompt, filename, width, height):
+        rng = seeds.rng(FORMAT, os.path.basename(filename), "pollinations")
         horror_prompt = f"dark horror atmosphere, creepy, unsettling, grainy, vintage horror, {prompt}"
         negative = "bright,colorful,happy,cheerful,cartoon,text,logo,watermark"
-        seed = random.randint(1, 999999)
+        seed = rng.randint(1, 999999)
         
         url = (
             f"https://image.pollinations.ai/prompt/{requests.utils.quote(horror_prompt)}"
@@ -148,7 +180,7 @@ class HorrorAssetGen:
             f"&nologo=true&seed={seed}"
         )
         
-        r = requests.get(url, timeout=20)
+        r = net.get(url, timeout=POLLINATIONS_BUDGET)
         if r.status_code == 200 and "image" in r.headers.get("Content-Type", ""):
             with open(filename, 'wb') as f:
                 f.write(r.content)
@@ -156,10 +188,11 @@ class HorrorAssetGen:
         raise Exception(f"Status {r.status_code}")
     
     def _generate_unsplash(self, topic, filename, width, height):
-        seed = random.randint(1, 9999)
+        rng = seeds.rng(FORMAT, os.path.basename(filename), "unsplash")
+        seed = rng.randint(1, 9999)
         url = f"https://source.unsplash.com/{width}x{height}/?dark,horror&sig={seed}"
         
-        r = requests.get(url, timeout=15, allow_redirects=True)
+        r = net.get(url, timeout=15, allow_redirects=True)
         if r.status_code == 200 and "image" in r.headers.get("Content-Type", ""):
             with open(filename, 'wb') as f:
                 f.write(r.content)
@@ -167,13 +200,14 @@ class HorrorAssetGen:
         raise Exception(f"Status {r.status_code}")
     
     def _generate_pexels(self, topic, filename, width, height):
+        rng = seeds.rng(FORMAT, os.path.basename(filename), "pexels")
         photo_ids = [3222684, 267614, 1402787, 8386440, 210186, 356056]
-        photo_id = random.choice(photo_ids)
-        seed = random.randint(1000, 9999)
+        photo_id = rng.choice(photo_ids)
+        seed = rng.randint(1000, 9999)
         
         url = f"https://images.pexels.com/photos/{photo_id}/pexels-photo-{photo_id}.jpeg?auto=compress&cs=tinysrgb&w={width}&h={height}&random={seed}"
         
-        r = requests.get(url, timeout=15)
+        r = net.get(url, timeout=15)
         if r.status_code == 200 and "image" in r.headers.get("Content-Type", ""):
             with open(filename, 'wb') as f:
                 f.write(r.content)
@@ -185,10 +219,11 @@ class HorrorAssetGen:
         raise Exception(f"Status {r.status_code}")
     
     def _generate_picsum(self, filename, width, height):
-        seed = random.randint(1, 1000)
+        rng = seeds.rng(FORMAT, os.path.basename(filename), "picsum")
+        seed = rng.randint(1, 1000)
         url = f"https://picsum.photos/{width}/{height}?random={seed}&grayscale"
         
-        r = requests.get(url, timeout=15, allow_redirects=True)
+        r = net.get(url, timeout=15, allow_redirects=True)
         if r.status_code == 200 and "image" in r.headers.get("Content-Type", ""):
             with open(filename, 'wb') as f:
                 f.write(r.content)
@@ -199,115 +234,93 @@ class HorrorAssetGen:
 
 def generate_scary_voice(text, filename):
     """
-    Generate creepy voice with pitch shifting
+    Generate creepy voice with the in-memory "horror" effects preset
     """
     try:
         print("🎤 Generating scary voice with Kokoro...")
-        import kokoro
-        import numpy as np
-        
-        tts = kokoro.KPipeline(lang_code="en-us")
-        audio_stream = tts(text, voice="am_adam", speed=0.95)
-        
-        audio_chunks = []
-        for chunk in audio_stream:
-            if isinstance(chunk, np.ndarray):
-                audio_data = chunk
-            elif hasattr(chunk, 'numpy'):
-                audio_data = chunk.numpy()
-            elif hasattr(chunk, '__array__'):
-                audio_data = np.asarray(chunk)
-            else:
-                audio_data = np.array(chunk, dtype=np.float32)
-            
-            if audio_data.ndim > 1:
-                audio_data = audio_data.flatten()
-            if audio_data.dtype != np.float32:
-                audio_data = audio_data.astype(np.float32)
-            
-            audio_chunks.append(audio_data)
-        
-        if not audio_chunks:
-            raise ValueError("No audio generated")
-        
-        audio_array = np.concatenate(audio_chunks, axis=0)
-        
-        max_val = np.abs(audio_array).max()
-        if max_val > 1.0:
-            audio_array = audio_array / max_val
-        
-        audio_int16 = (np.clip(audio_array, -1.0, 1.0) * 32767).astype(np.int16)
+        import audio_fx
+        import tts_engine
         
-        import scipy.io.wavfile as wavfile
-        temp_wav = filename.replace('.mp3', '_temp.wav')
-        wavfile.write(temp_wav, 24000, audio_int16)
-        
-        subprocess.run([
-            'ffmpeg', '-y', '-i', temp_wav,
-            '-af', 'asetrate=24000*0.92,atempo=1.087,aresample=24000,volume=1.2',
-            '-codec:a', 'libmp3lame', '-qscale:a', '2',
-            filename
-        ], capture_output=True, timeout=30)
-        
-        if os.path.exists(temp_wav):
-            os.remove(temp_wav)
+        audio_array = tts_engine.speak(text, voice=HORROR_VOICE, speed=HORROR_SPEED)
+        audio_fx.write_wav(filename, audio_fx.apply_chain(audio_array, "horror"))
         
         print(f"✅ Scary Kokoro voice generated")
-        return True
+        return filename
         
     except Exception as e:
         print(f"⚠️ Kokoro failed: {str(e)[:100]}, using gTTS...")
         from gtts import gTTS
+        filename = os.path.splitext(filename)[0] + '.mp3'
         tts = gTTS(text=text, lang='en', slow=True, tld='com')
         tts.save(filename)
         print(f"✅ gTTS fallback used")
-        return True
+        return filename
+
+def build_script(data):
+    return f"{data['setup']} ... ... {data['punchline']}"
+
+def warm_tts_cache():
+    """Synthesize every backup story so offline runs are fully cached."""
+    import tts_engine
+    scripts = [build_script({"setup": setup, "punchline": punchline}) for setup, punchline in BACKUP_STORIES]
+    tts_engine.warm(scripts, voice=HORROR_VOICE, speed=HORROR_SPEED)
 
 # --- MODULE 4: RENDER ---
 
-def render_scary_video(data, audio_path, output_file):
-    assets = HorrorAssetGen()
+def render_scary_video(data, audio_path, output_file, images, threads=4, renditions=None, workdir=None):
+    from moviepy.editor import AudioFileClip
+    from compositor import Compositor, Layer
+    from glyph_atlas import text_rgba
+    from ken_burns import KenBurnsLayer
+    import pipe_render
+    text_rgba = checkpoint.cached_text(text_rgba, workdir)
     
     audio = AudioFileClip(audio_path)
     duration = audio.duration + 2.0
+    audio.close()
     
-    img_path = assets.get_creepy_image(data['setup'])
+    # Background from the images stage; none means every provider failed
+    img_path = next((p for p in images if p and os.path.exists(p)), None)
     
     if img_path:
-        clip = ImageClip(img_path).resize(height=1920).crop(x1=0, width=1080).set_duration(duration)
+        # Slow creeping push-in, with the vignette baked into the pixels
+        background = [KenBurnsLayer(img_path, (1080, 1920), duration,
+                                    zoom=(1.0, 1.18), pan=((0.5, 0.45), (0.5, 0.55)), dim=0.6)]
     else:
-        clip = ColorClip(size=(1080, 1920), color=(10, 0, 0)).set_duration(duration)
-
-    vignette = ColorClip(size=(1080, 1920), color=(0,0,0)).set_opacity(0.6).set_duration(duration)
+        background = [Layer.solid((1080, 1920), (10, 0, 0)),
+                      Layer.solid((1080, 1920), (0, 0, 0), opacity=0.6)]
     
-    txt_args = {"font": FONT_PATH, "color": "white", "method": "caption", "size": (900, None), "align": "center"}
+    txt_args = {"color": "white", "max_width": 900, "align": "center"}
     
-    setup_txt = TextClip(f"\"{data['setup']}\"", fontsize=60, **txt_args)
-    setup_txt = setup_txt.set_position(('center', 400)).set_duration(duration)
+    setup_txt = text_rgba(f"\"{data['setup']}\"", 60, **txt_args)
+    setup_txt = Layer(setup_txt, pos=('center', 400))
     
     punch_start = duration * 0.4
-    punch_txt = TextClip(f"{data['punchline']}", fontsize=70, color="red", font=FONT_PATH, method="caption", size=(900, None), align="center")
-    punch_txt = punch_txt.set_position(('center', 1100)).set_start(punch_start).set_duration(duration - punch_start)
+    punch_txt = text_rgba(f"{data['punchline']}", 70, color="red", max_width=900, align="center")
+    punch_txt = Layer(punch_txt, pos=('center', 1100), start=punch_start)
 
-    final = CompositeVideoClip([clip, vignette, setup_txt, punch_txt]).set_audio(audio)
-    final.write_videofile(output_file, fps=24, codec='libx264', audio_codec='aac', threads=4, preset='fast')
+    compositor = Compositor((1080, 1920), [*background, setup_txt, punch_txt], duration)
+    return pipe_render.render(compositor, output_file, audio_path=audio_path, fps=24, threads=threads,
+                              preset='fast', renditions=renditions, bitexact=seeds.enabled(),
+                              segment_dir=os.path.join(workdir, "segments") if workdir else None,
+                              segment_key=checkpoint.inputs_key(data, audio_path, img_path))
 
 # --- MAIN ---
 
-def main():
-    mgr = HorrorContentManager()
-    data = mgr.get_content()
-    print(f"👻 Selected Story: {data['setup']}")
-    
-    full_text = f"{data['setup']} ... ... {data['punchline']}"
-    audio_path = os.path.join(OUTPUT_DIR, "scary_voice.mp3")
-    generate_scary_voice(full_text, audio_path)
-    
+def voice_over(data, filename=None):
+    return generate_scary_voice(build_script(data), filename or os.path.join(OUTPUT_DIR, "scary_voice.wav"))
+
+def prefetch_assets(data):
+    """Download the background. Returns the image paths that were found."""
+    path = HorrorAssetGen().get_creepy_image(data['setup'])
+    return [path] if path else []
+
+def render(data, audio_path, images, threads=4, renditions=None, workdir=None):
+    """Render every requested rendition in one pass from the prefetched images. Returns the video paths."""
     vid_path = os.path.join(OUTPUT_DIR, f"scary_{data['id']}.mp4")
-    render_scary_video(data, audio_path, vid_path)
-    
-    mgr.save_history(data['id'])
-    
+    return render_scary_video(data, audio_path, vid_path, images, threads=threads, renditions=renditions, workdir=workdir)
+
+def cleanup(audio_path):
     if os.path.exists(audio_path): 
         os.remove(audio_path)
     for f in os.listdir(CACHE_DIR): 
@@ -315,5 +328,53 @@ def main():
         if os.path.isfile(fp): 
             os.remove(fp)
 
+def main(renditions=None):
+    setup_dirs()
+    mgr = HorrorContentManager()
+    run = checkpoint.Run(FORMAT)
+    data = run.stage("content", mgr.get_content)
+    print(f"👻 Selected Story: {data['setup']}")
+    images = run.stage("images", lambda: prefetch_assets(data), files=True)
+    audio_path = run.stage("audio", lambda: voice_over(data), files=True)
+    run.stage("render", lambda: render(data, audio_path, images, renditions=renditions, workdir=run.dir),
+              files=True, key=renditions)
+    mgr.save_history(data['id'])
+    # Intermediates go only once the history is written
+    cleanup(audio_path)
+    run.finish()
+
+def list_candidates():
+    for story in HorrorContentManager().iter_candidates():
+        print(f"  {story['id']}: {story['setup'][:70]}")
+
+def prefetch():
+    """Pick today's story and download its background without rendering."""
+    setup_dirs()
+    prefetch_assets(HorrorContentManager().get_content())
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Mythica Report horror short generator")
+    parser.add_argument("command", nargs="?", default="render",
+                        choices=["render", "list", "validate-history", "prefetch", "warm-tts"])
+    parser.add_argument("--renditions", nargs="+", metavar="NAME",
+                        help="outputs to encode from one pass: shorts 720p square (default: shorts)")
+    parser.add_argument("--deterministic", action="store_true",
+                        help="seed all randomness from the content so reruns are byte-identical")
+    args = parser.parse_args(argv)
+    if args.deterministic:
+        seeds.enable()
+
+    if args.command == "render":
+        main(args.renditions)
+    elif args.command == "list":
+        list_candidates()
+    elif args.command == "validate-history":
+        return 0 if HorrorContentManager().validate_history() else 1
+    elif args.command == "prefetch":
+        prefetch()
+    elif args.command == "warm-tts":
+        warm_tts_cache()
+    return 0
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(cli())
@@ -1,15 +1,20 @@
 import os
 import json
-import random
 import re
+import hashlib
+import argparse
 import requests
-import subprocess
-import time
-import numpy as np
-from PIL import Image
-from moviepy.editor import *
-from moviepy.config import change_settings
-# Add this right after your imports, before any other code:
+import net
+import image_check
+import provider_health
+import search_cache
+import image_pool
+import seeds
+import checkpoint
+import history
+
+# MoviePy and the TTS stack are imported where they are used so that
+# commands which never render (list, validate-history, prefetch) start fast.
 
 # Fix PIL.Image.ANTIALIAS deprecation for MoviePy compatibility
 from PIL import Image
@@ -19,18 +24,31 @@ if not hasattr(Image, 'BILINEAR'):
     Image.BILINEAR = Image.LANCZOS
 
 # --- CONFIG ---
-change_settings({"IMAGEMAGICK_BINARY": "/usr/bin/convert"})
+FORMAT = "fact"  # key for content-seeded randomness (seeds.py)
+POLLINATIONS_BUDGET = 12  # seconds before falling back to a pooled image (image_pool.py)
 BASE_DIR = os.getcwd()
 DATA_DIR = os.path.join(BASE_DIR, "data")
 OUTPUT_DIR = os.path.join(BASE_DIR, "output")
 CACHE_DIR = os.path.join(OUTPUT_DIR, "cache")
-ASSETS_DIR = os.path.join(BASE_DIR, ".github/assets")
-FONT_PATH = os.path.join(ASSETS_DIR, "fonts/Montserrat-Bold.ttf")
 
-if not os.path.exists(FONT_PATH): 
-    FONT_PATH = "DejaVu-Sans-Bold"
-for d in [DATA_DIR, OUTPUT_DIR, CACHE_DIR]: 
-    os.makedirs(d, exist_ok=True)
+def setup_dirs():
+    for d in [DATA_DIR, OUTPUT_DIR, CACHE_DIR]: 
+        os.makedirs(d, exist_ok=True)
+
+FACT_VOICE = "af_sarah"
+FACT_SPEED = 1.05
+FACT_INTRO = "Here is a fact that sounds fake, but is actually true."
+
+BACKUP_FACTS = [
+    ("b_01", "Wombat poop is cube-shaped to stop it from rolling away."),
+    ("b_02", "Honey never spoils. You can eat 3000-year-old honey."),
+    ("b_03", "Oxford University is older than the Aztec Empire."),
+    ("b_04", "Nintendo was founded in 1889 and originally made playing cards."),
+    ("b_05", "A group of flamingos is called a 'flamboyance'."),
+    ("b_06", "Octopuses have three hearts and blue blood."),
+    ("b_07", "Bananas are berries, but strawberries aren't."),
+    ("b_08", "There are more possible iterations of a chess game than atoms in the known universe."),
+]
 
 # --- MODULE 1: FACT MINER ---
 
@@ -56,7 +74,8 @@ class FactManager:
         text = re.sub(r"(?i)^(til|today i learned)( that)?[:\s-]*", "", text)
         return text[0].upper() + text[1:] if text else text
 
-    def get_content(self):
+    def iter_candidates(self):
+        """Yield unseen, SFW, cleaned-up TIL facts from the Pushshift archive, best first."""
         try:
             print("🧠 Mining r/todayilearned for weird facts...")
             
@@ -69,48 +88,49 @@ class FactManager:
                 'fields': 'id,title,over_18'
             }
             
-            r = requests.get(url, params=params, timeout=15)
-            if r.status_code == 200:
-                data = r.json()
-                
-                for post in data.get('data', []):
-                    pid = post.get('id', '')
-                    title = post.get('title', '')
-                    over_18 = post.get('over_18', False)
-                    
-                    if pid in self.history or over_18 or len(title) > 200:
-                        continue
-                    
-                    cleaned = self.clean_text(title)
-                    if cleaned:
-                        print(f"✅ Found from Pushshift: {cleaned[:50]}...")
-                        return {
-                            "id": pid,
-                            "text": cleaned
-                        }
+            for fact in search_cache.search(url, params, self._parse_post, self.history):
+                print(f"✅ Found from Pushshift: {fact['text'][:50]}...")
+                yield fact
         except Exception as e:
             print(f"⚠️ Scrape failed: {e}")
+
+    def _parse_post(self, post):
+        """One raw pullpush post -> cleaned fact, or None if it is NSFW, too long or empty."""
+        title = post.get('title', '')
+        if post.get('over_18', False) or len(title) > 200:
+            return None
+        cleaned = self.clean_text(title)
+        if not cleaned:
+            return None
+        return {
+            "id": post.get('id', ''),
+            "text": cleaned
+        }
+
+    def validate_history(self):
+        """Report problems in the history file. Returns True when it is clean."""
+        return history.validate(self.history_file)
+
+    def get_content(self):
+        fact = next(self.iter_candidates(), None)
+        if fact:
+            return fact
         
-        backups = [
-            ("b_01", "Wombat poop is cube-shaped to stop it from rolling away."),
-            ("b_02", "Honey never spoils. You can eat 3000-year-old honey."),
-            ("b_03", "Oxford University is older than the Aztec Empire."),
-            ("b_04", "Nintendo was founded in 1889 and originally made playing cards."),
-            ("b_05", "A group of flamingos is called a 'flamboyance'."),
-            ("b_06", "Octopuses have three hearts and blue blood."),
-            ("b_07", "Bananas are berries, but strawberries aren't."),
-            ("b_08", "There are more possible iterations of a chess game than atoms in the known universe."),
-        ]
-        sel = random.choice(backups)
+        unused = [b for b in BACKUP_FACTS if b[0] not in self.history] or BACKUP_FACTS
+        sel = seeds.rng(FORMAT, f"backup-{len(self.history)}").choice(unused)
         return {"id": sel[0], "text": sel[1]}
 
 # --- MODULE 2: ASSET GENERATOR ---
 
 class AssetGen:
     def get_fact_image(self, text):
-        filename = os.path.join(CACHE_DIR, f"fact_{abs(hash(text))}.jpg")
+        filename = os.path.join(CACHE_DIR, f"fact_{hashlib.md5(text.encode('utf-8')).hexdigest()[:16]}.jpg")
         width, height = 1080, 1920
         
+        if image_check.is_valid(filename, (width, height), video_format=FORMAT):
+            print("♻️ Using prefetched fact image")
+            return filename
+        
         text_lower = text.lower()
         if any(word in text_lower for word in ["animal", "wombat", "octopus", "flamingo"]):
             topic = "nature"
@@ -125,18 +145,36 @@ class AssetGen:
         
         providers = [
             ("Pollinations", lambda: self._generate_pollinations(text, filename, width, height)),
+            ("Pool", lambda: image_pool.take(topic, (width, height), filename)),
             ("Unsplash", lambda: self._generate_unsplash(topic, filename, width, height)),
             ("Pexels", lambda: self._generate_pexels(topic, filename, width, height)),
             ("Picsum", lambda: self._generate_picsum(filename, width, height))
         ]
         
-        for provider_name, provider_func in providers:
+        # Pollinations is the only prompt-matched source; a prefetched topic
+        # image comes next, then the stock fallbacks fastest-first by their
+        # recorded latency and success rate
+        for provider_name, provider_func in provider_health.order(providers, pinned=["Pollinations", "Pool"]):
             try:
                 print(f"🎨 Trying {provider_name} for fact image...")
-                result = provider_func()
-                if result and os.path.exists(result) and os.path.getsize(result) > 5000:
-                    print(f"✅ {provider_name} succeeded")
-                    return result
+                if provider_name == "Pool":
+                    # Local and instant: not a provider to keep health stats on
+                    result = provider_func()
+                    if not result:
+                        raise Exception("pool empty")
+                else:
+                    with provider_health.track(provider_name):
+                        result = provider_func()
+                # Checked outside track(): a poor image is not an outage
+                image_check.validate(result, (width, height), video_format=FORMAT)
+                print(f"✅ {provider_name} succeeded")
+                return result
+            except provider_health.CircuitOpen as e:
+                print(f"⏭️ Skipping {provider_name}: {e}")
+            except image_check.ImageRejected as e:
+                print(f"🚫 {provider_name} image rejected: {e.reason}")
+                if os.path.exists(filename):
+                    os.remove(filename)
             except Exception as e:
                 print(f"⚠️ {provider_name} failed: {str(e)[:50]}")
                 continue
@@ -145,9 +183,10 @@ class AssetGen:
         return None
     
     def _generate_pollinations(self, text, filename, width, height):
+        rng = seeds.rng(FORMAT, os.path.basename(filename), "pollinations")
         prompt = f"educational illustration, documentary style, professional, {text[:50]}"
         negative = "text,logo,watermark,ui,overlay"
-        seed = random.randint(1, 999999)
+        seed = rng.randint(1, 999999)
         
         url = (
             f"https://image.pollinations.ai/prompt/{requests.utils.quote(prompt)}"
@@ -156,7 +195,7 @@ class AssetGen:
             f"&nologo=true&enhance=true&seed={seed}"
         )
         
-        r = requests.get(url, timeout=20)
+        r = net.get(url, timeout=POLLINATIONS_BUDGET)
         if r.status_code == 200 and "image" in r.headers.get("Content-Type", ""):
             with open(filename, 'wb') as f:
                 f.write(r.content)
@@ -164,10 +203,11 @@ class AssetGen:
         raise Exception(f"Status {r.status_code}")
     
     def _generate_unsplash(self, topic, filename, width, height):
-        seed = random.randint(1, 9999)
+        rng = seeds.rng(FORMAT, os.path.basename(filename), "unsplash")
+        seed = rng.randint(1, 9999)
         url = f"https://source.unsplash.com/{width}x{height}/?{topic},education&sig={seed}"
         
-        r = requests.get(url, timeout=15, allow_redirects=True)
+        r = net.get(url, timeout=15, allow_redirects=True)
         if r.status_code == 200 and "image" in r.headers.get("Content-Type", ""):
             with open(filename, 'wb') as f:
                 f.write(r.content)
@@ -175,6 +215,7 @@ class AssetGen:
         raise Exception(f"Status {r.status_code}")
     
     def _generate_pexels(self, topic, filename, width, height):
+        rng = seeds.rng(FORMAT, os.path.basename(filename), "pexels")
         photo_ids = {
             "nature": [34950, 3222684, 2014422, 590041, 15286, 36717],
             "food": [1640777, 1410235, 2097090, 262959, 3338496, 3764640],
@@ -183,12 +224,12 @@ class AssetGen:
         }
         
         ids = photo_ids.get(topic, photo_ids["abstract"])
-        photo_id = random.choice(ids)
-        seed = random.randint(1000, 9999)
+        photo_id = rng.choice(ids)
+        seed = rng.randint(1000, 9999)
         
         url = f"https://images.pexels.com/photos/{photo_id}/pexels-photo-{photo_id}.jpeg?auto=compress&cs=tinysrgb&w={width}&h={height}&random={seed}"
         
-        r = requests.get(url, timeout=15)
+        r = net.get(url, timeout=15)
         if r.status_code == 200 and "image" in r.headers.get("Content-Type", ""):
             with open(filename, 'wb') as f:
                 f.write(r.content)
@@ -200,10 +241,11 @@ class AssetGen:
         raise Exception(f"Status {r.status_code}")
     
     def _generate_picsum(self, filename, width, height):
-        seed = random.randint(1, 1000)
+        rng = seeds.rng(FORMAT, os.path.basename(filename), "picsum")
+        seed = rng.randint(1, 1000)
         url = f"https://picsum.photos/{width}/{height}?random={seed}"
         
-        r = requests.get(url, timeout=15, allow_redirects=True)
+        r = net.get(url, timeout=15, allow_redirects=True)
         if r.status_code == 200 and "image" in r.headers.get("Content-Type", ""):
             with open(filename, 'wb') as f:
                 f.write(r.content)
@@ -216,124 +258,96 @@ def generate_voice(text, filename):
     """
     Generate energetic voice for facts
     """
+    import tts_engine
+    segments = [FACT_INTRO] + tts_engine.split_phrases(text)
     try:
         print("🎤 Generating voice with Kokoro...")
-        import kokoro
-        import numpy as np
-        
-        script = f"Here is a fact that sounds fake, but is actually true. {text}"
-        
-        tts = kokoro.KPipeline(lang_code="en-us")
-        audio_stream = tts(script, voice="af_sarah", speed=1.05)
-        
-        audio_chunks = []
-        for chunk in audio_stream:
-            if isinstance(chunk, np.ndarray):
-                audio_data = chunk
-            elif hasattr(chunk, 'numpy'):
-                audio_data = chunk.numpy()
-            elif hasattr(chunk, '__array__'):
-                audio_data = np.asarray(chunk)
-            else:
-                audio_data = np.array(chunk, dtype=np.float32)
-            
-            if audio_data.ndim > 1:
-                audio_data = audio_data.flatten()
-            if audio_data.dtype != np.float32:
-                audio_data = audio_data.astype(np.float32)
-            
-            audio_chunks.append(audio_data)
-        
-        if not audio_chunks:
-            raise ValueError("No audio generated")
-        
-        audio_array = np.concatenate(audio_chunks, axis=0)
-        
-        max_val = np.abs(audio_array).max()
-        if max_val > 1.0:
-            audio_array = audio_array / max_val
-        
-        audio_int16 = (np.clip(audio_array, -1.0, 1.0) * 32767).astype(np.int16)
+        import audio_fx
         
-        import scipy.io.wavfile as wavfile
-        temp_wav = filename.replace('.mp3', '_temp.wav')
-        wavfile.write(temp_wav, 24000, audio_int16)
-        
-        subprocess.run([
-            'ffmpeg', '-y', '-i', temp_wav,
-            '-codec:a', 'libmp3lame', '-qscale:a', '2',
-            '-ar', '24000',
-            filename
-        ], capture_output=True, timeout=30)
-        
-        if os.path.exists(temp_wav):
-            os.remove(temp_wav)
+        audio_array = tts_engine.speak(segments, voice=FACT_VOICE, speed=FACT_SPEED)
+        audio_fx.write_wav(filename, audio_fx.apply_chain(audio_array, "fact"))
         
         print(f"✅ Kokoro voice generated")
-        return True
+        return filename
         
     except Exception as e:
         print(f"⚠️ Kokoro failed: {str(e)[:100]}, using gTTS...")
         from gtts import gTTS
-        script = f"Here is a fact that sounds fake, but is actually true. {text}"
-        tts = gTTS(text=script, lang='en', slow=False, tld='com')
+        filename = os.path.splitext(filename)[0] + '.mp3'
+        tts = gTTS(text=" ".join(segments), lang='en', slow=False, tld='com')
         tts.save(filename)
         print(f"✅ gTTS fallback used")
-        return True
+        return filename
+
+def warm_tts_cache():
+    """Synthesize the intro and every backup fact so offline runs are fully cached."""
+    import tts_engine
+    scripts = [[FACT_INTRO]] + [tts_engine.split_phrases(text) for _, text in BACKUP_FACTS]
+    tts_engine.warm(scripts, voice=FACT_VOICE, speed=FACT_SPEED)
 
 # --- MODULE 4: RENDER ---
 
-def render_fact_video(data, audio_path, output_file):
-    assets = AssetGen()
+def render_fact_video(data, audio_path, output_file, images, threads=4, renditions=None, workdir=None):
+    from moviepy.editor import AudioFileClip
+    from compositor import Compositor, Layer
+    from glyph_atlas import text_rgba
+    from ken_burns import KenBurnsLayer
+    import pipe_render
+    text_rgba = checkpoint.cached_text(text_rgba, workdir)
     
     audio = AudioFileClip(audio_path)
     duration = audio.duration + 1.5
+    audio.close()
     
-    img_path = assets.get_fact_image(data['text'])
+    # Background from the images stage; none means every provider failed
+    img_path = next((p for p in images if p and os.path.exists(p)), None)
     if img_path:
-        clip = ImageClip(img_path).resize(height=1920).crop(x1=0, width=1080).set_duration(duration)
-        darken = ColorClip(size=(1080, 1920), color=(0,0,0)).set_opacity(0.6).set_duration(duration)
-        background = CompositeVideoClip([clip, darken])
+        # Gentle zoom with a slow drift across the image, darkened for the text
+        background = [KenBurnsLayer(img_path, (1080, 1920), duration,
+                                    zoom=(1.05, 1.15), pan=((0.4, 0.5), (0.6, 0.5)), dim=0.6)]
     else:
-        background = ColorClip(size=(1080, 1920), color=(20, 20, 30)).set_duration(duration)
+        background = [Layer.solid((1080, 1920), (20, 20, 30))]
 
-    header_box = ColorClip(size=(800, 150), color=(255, 200, 0)).set_position(('center', 150)).set_duration(duration)
-    header_txt = TextClip("FAKE OR REAL?", font=FONT_PATH, fontsize=80, color='black').set_position(('center', 165)).set_duration(duration)
+    header_box = Layer.solid((800, 150), (255, 200, 0), pos=('center', 150))
+    header_txt = Layer(text_rgba("FAKE OR REAL?", 80, color='black'), pos=('center', 165))
 
-    fact_txt = TextClip(data['text'], font=FONT_PATH, fontsize=65, color='white', 
-                        method='caption', size=(900, None), align='center', stroke_color='black', stroke_width=2)
-    fact_txt = fact_txt.set_position('center').set_duration(duration)
+    fact_txt = text_rgba(data['text'], 65, color='white', 
+                         max_width=900, align='center', stroke_color='black', stroke_width=2)
+    fact_txt = Layer(fact_txt, pos='center')
 
     stamp_time = duration * 0.7
-    stamp_duration = duration - stamp_time
     
-    stamp_box = ColorClip(size=(700, 200), color=(0, 200, 50)).set_position(('center', 1400)).set_start(stamp_time).set_duration(stamp_duration)
-    stamp_txt = TextClip("✅ 100% TRUE", font=FONT_PATH, fontsize=90, color='white').set_position(('center', 1450)).set_start(stamp_time).set_duration(stamp_duration)
+    stamp_box = Layer.solid((700, 200), (0, 200, 50), pos=('center', 1400), start=stamp_time)
+    stamp_txt = Layer(text_rgba("✅ 100% TRUE", 90, color='white'), pos=('center', 1450), start=stamp_time)
 
-    final = CompositeVideoClip([
-        background, 
+    compositor = Compositor((1080, 1920), [
+        *background, 
         header_box, header_txt,
         fact_txt,
         stamp_box, stamp_txt
-    ]).set_audio(audio)
+    ], duration)
     
-    final.write_videofile(output_file, fps=24, codec='libx264', audio_codec='aac', threads=4, preset='fast')
+    return pipe_render.render(compositor, output_file, audio_path=audio_path, fps=24, threads=threads,
+                              preset='fast', renditions=renditions, bitexact=seeds.enabled(),
+                              segment_dir=os.path.join(workdir, "segments") if workdir else None,
+                              segment_key=checkpoint.inputs_key(data, audio_path, img_path))
 
 # --- MAIN ---
 
-def main():
-    mgr = FactManager()
-    data = mgr.get_content()
-    print(f"🧠 Fact: {data['text']}")
-    
-    audio_path = os.path.join(OUTPUT_DIR, "fact_voice.mp3")
-    generate_voice(data['text'], audio_path)
-    
+def voice_over(data, filename=None):
+    return generate_voice(data['text'], filename or os.path.join(OUTPUT_DIR, "fact_voice.wav"))
+
+def prefetch_assets(data):
+    """Download the background. Returns the image paths that were found."""
+    path = AssetGen().get_fact_image(data['text'])
+    return [path] if path else []
+
+def render(data, audio_path, images, threads=4, renditions=None, workdir=None):
+    """Render every requested rendition in one pass from the prefetched images. Returns the video paths."""
     vid_path = os.path.join(OUTPUT_DIR, f"weird_fact_{data['id']}.mp4")
-    render_fact_video(data, audio_path, vid_path)
-    
-    mgr.save_history(data['id'])
-    
+    return render_fact_video(data, audio_path, vid_path, images, threads=threads, renditions=renditions, workdir=workdir)
+
+def cleanup(audio_path):
     if os.path.exists(audio_path): 
         os.remove(audio_path)
     for f in os.listdir(CACHE_DIR): 
@@ -341,5 +355,53 @@ def main():
         if os.path.isfile(fp): 
             os.remove(fp)
 
+def main(renditions=None):
+    setup_dirs()
+    mgr = FactManager()
+    run = checkpoint.Run(FORMAT)
+    data = run.stage("content", mgr.get_content)
+    print(f"🧠 Fact: {data['text']}")
+    images = run.stage("images", lambda: prefetch_assets(data), files=True)
+    audio_path = run.stage("audio", lambda: voice_over(data), files=True)
+    run.stage("render", lambda: render(data, audio_path, images, renditions=renditions, workdir=run.dir),
+              files=True, key=renditions)
+    mgr.save_history(data['id'])
+    # Intermediates go only once the history is written
+    cleanup(audio_path)
+    run.finish()
+
+def list_candidates():
+    for fact in FactManager().iter_candidates():
+        print(f"  {fact['id']}: {fact['text'][:70]}")
+
+def prefetch():
+    """Pick today's fact and download its background without rendering."""
+    setup_dirs()
+    prefetch_assets(FactManager().get_content())
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Mythica Report fake-or-real fact generator")
+    parser.add_argument("command", nargs="?", default="render",
+                        choices=["render", "list", "validate-history", "prefetch", "warm-tts"])
+    parser.add_argument("--renditions", nargs="+", metavar="NAME",
+                        help="outputs to encode from one pass: shorts 720p square (default: shorts)")
+    parser.add_argument("--deterministic", action="store_true",
+                        help="seed all randomness from the content so reruns are byte-identical")
+    args = parser.parse_args(argv)
+    if args.deterministic:
+        seeds.enable()
+
+    if args.command == "render":
+        main(args.renditions)
+    elif args.command == "list":
+        list_candidates()
+    elif args.command == "validate-history":
+        return 0 if FactManager().validate_history() else 1
+    elif args.command == "prefetch":
+        prefetch()
+    elif args.command == "warm-tts":
+        warm_tts_cache()
+    return 0
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(cli())
@@ -0,0 +1,311 @@
+"""
+Memory-mapped glyph atlas for Montserrat.
+
+Every caption in the three formats uses one font at a handful of sizes, so
+instead of asking ImageMagick to rasterize each string we prebuild, per size,
+the alpha coverage bitmap of every glyph plus advance and kerning tables.
+Bitmaps live in one raw uint8 page (`.bin`, opened with np.memmap so any
+number of render processes share the same OS pages); metrics live in a small
+JSON index. Files are versioned by the font's sha256, so a font change simply
+produces a new atlas. Characters outside the atlas (emoji like ✅) are
+rasterized on the fly from the first font that really has them (Montserrat,
+then FALLBACK_FONTS) and cached per process; characters no font covers are
+dropped rather than drawn as a .notdef box.
+
+    python .github/scripts/glyph_atlas.py build [--sizes 60 65 70] [--force]
+"""
+import os
+import json
+import hashlib
+import argparse
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageColor
+
+BASE_DIR = os.getcwd()
+FONT_PATH = os.path.join(BASE_DIR, ".github/assets/fonts/Montserrat-Bold.ttf")
+ATLAS_DIR = os.path.join(BASE_DIR, ".cache", "glyphs")
+
+ATLAS_VERSION = 1
+SIZES = [60, 65, 70, 80, 85, 90, 140]
+PAGE_WIDTH = 2048
+PADDING = 2
+
+ASCII = "".join(chr(c) for c in range(32, 127))
+CHARSET = ASCII + "".join(chr(c) for c in range(160, 256)) + "‘’“”–—…•€™"
+# Symbol fonts first: DejaVu has no ✅ and would draw its .notdef box
+FALLBACK_FONTS = ["Symbola.ttf", "Symbola_hint.ttf", "NotoSansSymbols2-Regular.ttf",
+                  "DejaVuSans-Bold.ttf", "DejaVuSans.ttf"]
+NOTDEF_PROBE = "\U0010fffd"  # private-use codepoint no font maps, so it draws .notdef
+
+_font_hash = {}
+_atlases = {}
+
+def font_hash(font_path=FONT_PATH):
+    if font_path not in _font_hash:
+        with open(font_path, 'rb') as f:
+            _font_hash[font_path] = hashlib.sha256(f.read()).hexdigest()
+    return _font_hash[font_path]
+
+def _atlas_paths(size, font_path=FONT_PATH):
+    stem = os.path.splitext(os.path.basename(font_path))[0].lower()
+    base = os.path.join(ATLAS_DIR, f"{stem}-{font_hash(font_path)[:12]}-{size}")
+    return f"{base}.json", f"{base}.bin"
+
+def _rasterize(font, ch):
+    """Return (coverage, left, top) for one glyph, or None for blank glyphs."""
+    left, top, right, bottom = font.getbbox(ch)
+    if right <= left or bottom <= top:
+        return None
+    img = Image.new("L", (right - left, bottom - top), 0)
+    ImageDraw.Draw(img).text((-left, -top), ch, font=font, fill=255)
+    return np.asarray(img), left, top
+
+def _covers(font, ch):
+    """True if `font` has a real glyph for `ch` rather than its .notdef box."""
+    if ch.isspace():
+        return True
+    raster = _rasterize(font, ch)
+    if raster is None:
+        return False
+    notdef = _rasterize(font, NOTDEF_PROBE)
+    return notdef is None or raster[0].shape != notdef[0].shape or not np.array_equal(raster[0], notdef[0])
+
+# --- BUILD ---
+
+def build(size, font_path=FONT_PATH):
+    """Rasterize CHARSET at `size`, shelf-pack it into one page and write the atlas."""
+    font = ImageFont.truetype(font_path, size)
+    ascent, descent = font.getmetrics()
+
+    glyphs = {}
+    bitmaps = []
+    x = y = shelf = 0
+    for ch in CHARSET:
+        advance = font.getlength(ch)
+        raster = _rasterize(font, ch)
+        if raster is None:
+            glyphs[ch] = [0, 0, 0, 0, 0, 0, advance]
+            continue
+        bitmap, left, top = raster
+        h, w = bitmap.shape
+        if x + w > PAGE_WIDTH:
+            x, y, shelf = 0, y + shelf + PADDING, 0
+        bitmaps.append((x, y, bitmap))
+        glyphs[ch] = [x, y, w, h, left, top, advance]
+        x += w + PADDING
+        shelf = max(shelf, h)
+
+    page = np.zeros((y + shelf, PAGE_WIDTH), dtype=np.uint8)
+    for gx, gy, bitmap in bitmaps:
+        page[gy:gy + bitmap.shape[0], gx:gx + bitmap.shape[1]] = bitmap
+
+    kerning = {}
+    for a in ASCII:
+        for b in ASCII:
+            k = font.getlength(a + b) - glyphs[a][6] - glyphs[b][6]
+            if abs(k) >= 0.5:
+                kerning[a + b] = round(k, 2)
+
+    index = {
+        "version": ATLAS_VERSION,
+        "font_sha256": font_hash(font_path),
+        "size": size,
+        "ascent": ascent,
+        "descent": descent,
+        "page_shape": list(page.shape),
+        "glyphs": glyphs,
+        "kerning": kerning,
+    }
+
+    os.makedirs(ATLAS_DIR, exist_ok=True)
+    json_path, bin_path = _atlas_paths(size, font_path)
+    # Render workers can build the same atlas at once: each writes its own
+    # temp files, and the .bin is swapped in whole before its index
+    bin_tmp, json_tmp = f"{bin_path}.{os.getpid()}.tmp", f"{json_path}.{os.getpid()}.tmp"
+    page.tofile(bin_tmp)
+    with open(json_tmp, 'w') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(bin_tmp, bin_path)
+    os.replace(json_tmp, json_path)
+    return json_path
+
+def is_built(size, font_path=FONT_PATH):
+    """True if the atlas for this font, size and ATLAS_VERSION is on disk."""
+    json_path, bin_path = _atlas_paths(size, font_path)
+    try:
+        with open(json_path, encoding='utf-8') as f:
+            return json.load(f).get("version") == ATLAS_VERSION and os.path.exists(bin_path)
+    except (OSError, ValueError):
+        return False
+
+def build_all(sizes=SIZES, font_path=FONT_PATH, force=False):
+    for size in sizes:
+        if not force and is_built(size, font_path):
+            print(f"♻️ Glyph atlas for {size}pt is up to date")
+            continue
+        path = build(size, font_path)
+        print(f"🔤 Built {os.path.basename(path)}")
+
+# --- ATLAS ---
+
+class GlyphAtlas:
+    def __init__(self, size, font_path=FONT_PATH):
+        json_path, bin_path = _atlas_paths(size, font_path)
+        if not os.path.exists(json_path):
+            print(f"🔤 No glyph atlas for {size}pt, building it...")
+            build(size, font_path)
+        with open(json_path, encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get("version") != ATLAS_VERSION:
+            build(size, font_path)
+            with open(json_path, encoding='utf-8') as f:
+                index = json.load(f)
+
+        self.size = size
+        self.font_path = font_path
+        self.ascent = index["ascent"]
+        self.descent = index["descent"]
+        self.line_height = self.ascent + self.descent
+        self.glyphs = index["glyphs"]
+        self.kerning = index["kerning"]
+        self.page = np.memmap(bin_path, dtype=np.uint8, mode='r', shape=tuple(index["page_shape"]))
+        self._fallback = {}
+        self._fonts = None
+
+    def _fallback_fonts(self):
+        if self._fonts is None:
+            self._fonts = [ImageFont.truetype(self.font_path, self.size)]
+            for name in FALLBACK_FONTS:
+                try:
+                    self._fonts.append(ImageFont.truetype(name, self.size))
+                except OSError:
+                    continue
+        return self._fonts
+
+    def _fallback_glyph(self, ch):
+        """Rasterize a character that is not in the atlas (emoji, symbols)."""
+        if ch not in self._fallback:
+            font = next((f for f in self._fallback_fonts() if _covers(f, ch)), None)
+            if font is None:
+                print(f"⚠️ No font has {ch!r} (U+{ord(ch):04X}), leaving it out")
+                self._fallback[ch] = (None, 0.0)
+            else:
+                self._fallback[ch] = (_rasterize(font, ch), font.getlength(ch))
+        return self._fallback[ch]
+
+    def advance(self, ch):
+        glyph = self.glyphs.get(ch)
+        return glyph[6] if glyph else self._fallback_glyph(ch)[1]
+
+    def measure(self, text):
+        width = 0.0
+        for i, ch in enumerate(text):
+            width += self.advance(ch)
+            if i:
+                width += self.kerning.get(text[i - 1] + ch, 0.0)
+        return width
+
+    def wrap(self, text, max_width):
+        """Greedy word wrap, like ImageMagick's caption: method."""
+        if max_width is None:
+            return text.split("\n")
+        lines = []
+        for paragraph in text.split("\n"):
+            line = ""
+            for word in paragraph.split(" "):
+                candidate = f"{line} {word}" if line else word
+                if line and self.measure(candidate) > max_width:
+                    lines.append(line)
+                    line = word
+                else:
+                    line = candidate
+            lines.append(line)
+        return lines
+
+    def _blit(self, canvas, ch, pen_x, baseline_top):
+        glyph = self.glyphs.get(ch)
+        if glyph:
+            gx, gy, w, h, left, top, _ = glyph
+            if not w:
+                return
+            bitmap = self.page[gy:gy + h, gx:gx + w]
+        else:
+            raster, _ = self._fallback_glyph(ch)
+            if raster is None:
+                return
+            bitmap, left, top = raster
+            h, w = bitmap.shape
+
+        x, y = int(round(pen_x)) + left, baseline_top + top
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, canvas.shape[1]), min(y + h, canvas.shape[0])
+        if x0 < x1 and y0 < y1:
+            region = canvas[y0:y1, x0:x1]
+            np.maximum(region, bitmap[y0 - y:y1 - y, x0 - x:x1 - x], out=region)
+
+    def render(self, text, max_width=None, align='center'):
+        """Lay out `text` and return its HxW uint8 alpha coverage."""
+        lines = self.wrap(text, max_width)
+        widths = [self.measure(line) for line in lines]
+        width = max_width or int(np.ceil(max(widths, default=0)))
+        canvas = np.zeros((self.line_height * len(lines), max(width, 1)), dtype=np.uint8)
+
+        for row, (line, line_width) in enumerate(zip(lines, widths)):
+            if align == 'center':
+                pen_x = (width - line_width) / 2
+            elif align == 'right':
+                pen_x = width - line_width
+            else:
+                pen_x = 0.0
+            for i, ch in enumerate(line):
+                if i:
+                    pen_x += self.kerning.get(line[i - 1] + ch, 0.0)
+                self._blit(canvas, ch, pen_x, row * self.line_height)
+                pen_x += self.advance(ch)
+        return canvas
+
+def get_atlas(size):
+    if size not in _atlases:
+        _atlases[size] = GlyphAtlas(size)
+    return _atlases[size]
+
+def _dilate(alpha, radius):
+    out = alpha.copy()
+    for dy in range(-radius, radius + 1):
+        for dx in range(-radius, radius + 1):
+            if dx * dx + dy * dy > radius * radius or (dx == 0 and dy == 0):
+                continue
+            shifted = np.roll(np.roll(alpha, dy, axis=0), dx, axis=1)
+            np.maximum(out, shifted, out=out)
+    return out
+
+def text_rgba(text, size, color='white', max_width=None, align='center',
+              stroke_color=None, stroke_width=0):
+    """Render text to a straight-alpha HxWx4 uint8 image ready for compositor.Layer."""
+    alpha = get_atlas(size).render(text, max_width=max_width, align=align)
+    fill = np.array(ImageColor.getrgb(color)[:3], dtype=np.float32)
+
+    if stroke_color and stroke_width:
+        alpha = np.pad(alpha, stroke_width)
+        outer = _dilate(alpha, stroke_width)
+        stroke = np.array(ImageColor.getrgb(stroke_color)[:3], dtype=np.float32)
+        a_fill = alpha[..., None].astype(np.float32)
+        a_out = np.maximum(outer[..., None].astype(np.float32), 1.0)
+        rgb = (fill * a_fill + stroke * (outer[..., None] - a_fill).clip(0)) / a_out
+        return np.dstack([rgb.round().astype(np.uint8), outer])
+
+    rgb = np.empty(alpha.shape + (3,), dtype=np.uint8)
+    rgb[:] = fill.astype(np.uint8)
+    return np.dstack([rgb, alpha])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the memory-mapped Montserrat glyph atlas")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--force", action="store_true", help="rebuild even if the atlas is up to date")
+    args = parser.parse_args(argv)
+    build_all(args.sizes, force=args.force)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,30 @@
+"""
+Checks shared by the per-format history files (data/*history.json).
+
+Each generator keeps a JSON list of the content IDs it has already posted.
+The `validate-history` command of every generator reports on its own file
+through `validate(path)`:
+
+    python .github/scripts/auto_generate.py validate-history
+"""
+import os
+import json
+
+def validate(path):
+    """Report problems in a history file. Returns True when it is clean."""
+    if not os.path.exists(path):
+        print(f"⚠️ No history file at {path}")
+        return True
+    try:
+        with open(path, 'r') as f:
+            entries = json.load(f)
+    except Exception as e:
+        print(f"❌ {path} is not valid JSON: {e}")
+        return False
+    if not isinstance(entries, list):
+        print(f"❌ {path} should hold a list, got {type(entries).__name__}")
+        return False
+    bad = [e for e in entries if not isinstance(e, str) or not e]
+    dupes = len(entries) - len(set(map(str, entries)))
+    print(f"📜 {len(entries)} entries, {dupes} duplicates, {len(bad)} malformed")
+    return not bad
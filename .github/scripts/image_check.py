@@ -0,0 +1,200 @@
+"""
+Cheap validation for downloaded background images.
+
+A provider "succeeding" used to mean the file was over 5 KB, which lets
+through HTML error pages saved as .jpg, truncated downloads, blank
+placeholders and the wrong shape entirely. `validate()` runs two stages:
+
+1. Header sniff: reads the first few KB (following JPEG segment lengths
+   past them if EXIF/ICC blocks are large) and the last few hundred bytes
+   to get the real format and dimensions, spot HTML/JSON bodies and check
+   the JPEG/PNG end marker, without decoding any pixels.
+2. Draft thumbnail: asks the JPEG decoder for a 1/8-scale draft (other
+   formats are decoded and shrunk) and looks at a ~128px greyscale copy for
+   near-uniform, low-contrast and mostly-text images.
+
+Both stages are a few milliseconds, so every candidate can be checked.
+Rejections raise ImageRejected with a short reason for the provider loop.
+Pass `video_format` to use that format's content floors (CONTENT_FLOORS).
+"""
+import os
+import struct
+from PIL import Image, ImageFilter
+
+MIN_BYTES = 5000
+HEADER_BYTES = 64 * 1024
+TAIL_BYTES = 512  # end markers may be followed by padding or trailing junk
+THUMB_SIZE = 128
+
+MIN_SCALE = 0.5          # each side must be at least half the requested size
+MAX_ASPECT_ERROR = 0.35  # relative difference between actual and requested w/h
+MIN_STDDEV = 8.0         # below this the image is basically one colour
+MIN_CONTRAST = 32        # 5th..95th percentile luminance spread
+TEXT_BACKGROUND = 0.5    # share of pixels in the dominant luminance bin...
+TEXT_EDGES = 0.2         # ...plus this share of hard edges looks like a text card
+
+# Per-format (stddev, contrast) floors. Horror backgrounds are dark and murky
+# on purpose and are dimmed further when rendered, so they get lower floors.
+CONTENT_FLOORS = {
+    "horror": (4.0, 14),
+}
+
+class ImageRejected(Exception):
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+# --- HEADER SNIFF ---
+
+def _jpeg_size(f):
+    """Walk the JPEG segments by their lengths, seeking over large APPn blocks."""
+    f.seek(2)
+    while True:
+        prefix = f.read(1)
+        if not prefix:
+            return None
+        if prefix != b"\xff":
+            continue
+        marker = f.read(1)
+        while marker == b"\xff":  # fill bytes
+            marker = f.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            continue
+        if marker in (0xD9, 0xDA):
+            return None  # image data or end reached without a frame header
+        segment = f.read(2)
+        if len(segment) < 2:
+            return None
+        length = struct.unpack(">H", segment)[0]
+        # SOF0..SOF15, except DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            h, w = struct.unpack(">HH", frame[1:5])
+            return w, h
+        f.seek(length - 2, os.SEEK_CUR)
+
+def _webp_size(head):
+    chunk = head[12:16]
+    if chunk == b"VP8 " and len(head) >= 30:
+        w, h = struct.unpack("<HH", head[26:30])
+        return w & 0x3FFF, h & 0x3FFF
+    if chunk == b"VP8L" and len(head) >= 25:
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(head) >= 30:
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+def sniff(path):
+    """Return (format, width, height) from the file header, or raise ImageRejected."""
+    size = os.path.getsize(path)
+    if size < MIN_BYTES:
+        raise ImageRejected(f"too small ({size} bytes)")
+
+    with open(path, 'rb') as f:
+        head = f.read(HEADER_BYTES)
+        f.seek(-min(TAIL_BYTES, size), os.SEEK_END)
+        tail = f.read()
+        jpeg_dims = _jpeg_size(f) if head.startswith(b"\xff\xd8\xff") else None
+
+    start = head[:256].lstrip().lower()
+    if start.startswith((b"<!doctype", b"<html", b"<?xml", b"<head", b"<body", b"{", b"[")):
+        raise ImageRejected("HTML/JSON body instead of an image")
+
+    if head.startswith(b"\xff\xd8\xff"):
+        fmt, dims = "JPEG", jpeg_dims
+        if b"\xff\xd9" not in tail:
+            raise ImageRejected("truncated JPEG (no EOI marker)")
+    elif head.startswith(b"\x89PNG\r\n\x1a\n"):
+        fmt, dims = "PNG", struct.unpack(">II", head[16:24]) if len(head) >= 24 else None
+        if b"IEND\xaeB`\x82" not in tail:
+            raise ImageRejected("truncated PNG (no IEND chunk)")
+    elif head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        fmt, dims = "WEBP", _webp_size(head)
+    elif head[:6] in (b"GIF87a", b"GIF89a"):
+        fmt, dims = "GIF", struct.unpack("<HH", head[6:10])
+    else:
+        raise ImageRejected(f"unknown format (starts {head[:8]!r})")
+
+    if not dims or not all(dims):
+        raise ImageRejected(f"{fmt} header has no dimensions")
+    return fmt, dims[0], dims[1]
+
+def check_shape(width, height, target):
+    """Reject images far smaller than, or a very different shape from, `target` (w, h)."""
+    tw, th = target
+    if width < tw * MIN_SCALE or height < th * MIN_SCALE:
+        raise ImageRejected(f"too small ({width}x{height} for {tw}x{th})")
+    aspect, wanted = width / height, tw / th
+    if abs(aspect - wanted) / wanted > MAX_ASPECT_ERROR:
+        raise ImageRejected(f"wrong aspect ratio ({width}x{height} for {tw}x{th})")
+
+# --- THUMBNAIL CHECKS ---
+
+def thumbnail(path):
+    """Small greyscale copy, using the JPEG draft mode to skip most of the decode."""
+    with Image.open(path) as img:
+        img.draft("L", (THUMB_SIZE * 2, THUMB_SIZE * 2))
+        try:
+            img = img.convert("L")
+        except OSError as e:
+            raise ImageRejected(f"decode failed ({str(e)[:40]})")
+        img.thumbnail((THUMB_SIZE, THUMB_SIZE))
+        return img
+
+def _percentile(hist, total, q):
+    target = total * q
+    seen = 0
+    for value, count in enumerate(hist):
+        seen += count
+        if seen >= target:
+            return value
+    return 255
+
+def check_content(thumb, video_format=None):
+    min_stddev, min_contrast = CONTENT_FLOORS.get(video_format, (MIN_STDDEV, MIN_CONTRAST))
+    hist = thumb.histogram()
+    total = thumb.width * thumb.height
+
+    mean = sum(v * c for v, c in enumerate(hist)) / total
+    stddev = (sum(c * (v - mean) ** 2 for v, c in enumerate(hist)) / total) ** 0.5
+    if stddev < min_stddev:
+        raise ImageRejected(f"near-uniform (stddev {stddev:.1f})")
+
+    contrast = _percentile(hist, total, 0.95) - _percentile(hist, total, 0.05)
+    if contrast < min_contrast:
+        raise ImageRejected(f"low contrast (spread {contrast})")
+
+    # Text cards and error placeholders: a flat background with sharp glyph edges
+    bins = [sum(hist[i:i + 16]) for i in range(0, 256, 16)]
+    background = max(bins) / total
+    edges = thumb.filter(ImageFilter.FIND_EDGES).histogram()
+    edge_share = sum(edges[64:]) / total
+    if background > TEXT_BACKGROUND and edge_share > TEXT_EDGES:
+        raise ImageRejected(f"mostly text ({background:.0%} flat, {edge_share:.0%} edges)")
+
+def validate(path, target=None, video_format=None):
+    """
+    Check a downloaded image. Returns (format, width, height) or raises
+    ImageRejected(reason). `target` is the requested (w, h), if any;
+    `video_format` the video it is for ("horror"...), if any.
+    """
+    if not path or not os.path.exists(path):
+        raise ImageRejected("no file")
+    fmt, width, height = sniff(path)
+    if target:
+        check_shape(width, height, target)
+    check_content(thumbnail(path), video_format)
+    return fmt, width, height
+
+def is_valid(path, target=None, video_format=None):
+    try:
+        validate(path, target, video_format)
+        return True
+    except ImageRejected:
+        return False
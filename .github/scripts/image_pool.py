@@ -0,0 +1,208 @@
+"""
+Topic-pooled background images, prefetched off the critical path.
+
+The generators only ever ask for a handful of topic buckets, so a few
+validated, already-resized images per (topic, size) are kept on disk in
+.cache/image_pool/<topic>/<W>x<H>/. When the prompt-specific Pollinations
+image misses its budget, get_ai_image / get_creepy_image / get_fact_image
+take one from the matching pool instantly instead of working down the
+stock providers to a gradient. Taken images leave the pool, so nothing
+repeats until it is refilled.
+
+Pools are topped up once a batch has its content and images (run_all),
+while the render daemon is idle, or by hand:
+
+    python .github/scripts/image_pool.py fill [--target 3] [--topics space food]
+    python .github/scripts/image_pool.py status
+
+Pool images are not content-keyed, so in deterministic mode (seeds.py)
+the pool is never used.
+"""
+import os
+import time
+import random
+import shutil
+import argparse
+import threading
+import requests
+from PIL import Image, ImageOps
+
+import net
+import seeds
+import image_check
+import provider_health
+
+BASE_DIR = os.getcwd()
+POOL_DIR = os.path.join(BASE_DIR, ".cache", "image_pool")
+# Cassette replays draw from their own pool, so take() never empties the real one
+if os.environ.get("HTTP_CASSETTE", "").lower() == "replay":
+    POOL_DIR = os.path.join(BASE_DIR, ".cache", "http", "image_pool")
+
+HALF = (1080, 960)
+FULL = (1080, 1920)
+POOL_TARGET = 3
+STALE_SECONDS = 600  # a partial download older than this belongs to a killed fill
+
+TOPIC_PROMPTS = {
+    "action": "dramatic action scene, dynamic motion, cinematic lighting",
+    "food": "delicious food close-up, appetizing, studio lighting",
+    "space": "deep space, nebula and planets, cinematic",
+    "nature": "breathtaking nature landscape, wildlife, golden hour",
+    "people": "candid people in a city street, cinematic, shallow depth of field",
+    "abstract": "abstract colorful shapes, soft gradients, modern art",
+    "technology": "futuristic technology, glowing circuits, high tech lab",
+    "horror": "dark horror atmosphere, creepy, unsettling, grainy, vintage horror, abandoned house at night",
+}
+PEXELS_IDS = {
+    "action": [2045531, 6153896, 8386440, 1181244, 4974912, 3861959],
+    "food": [1640777, 1410235, 2097090, 262959, 3338496, 3764640],
+    "space": [2387873, 59989, 132037, 145035, 210186, 62415],
+    "nature": [34950, 3222684, 2014422, 590041, 15286, 36717],
+    "people": [3184395, 3184325, 1671643, 1181671, 1222271, 1546906],
+    "abstract": [3222684, 267614, 1402787, 8386440, 210186, 356056],
+    "technology": [2045531, 6153896, 8386440, 1181244, 4974912, 3861959],
+    "horror": [3222684, 267614, 1402787, 8386440, 210186, 356056],
+}
+NEGATIVE = "blurry,low quality,watermark,text,logo,ui,overlay,frame,border"
+
+# (topic, size) pools the generators draw from: WYR halves, horror and fact fulls
+POOLS = [(topic, HALF) for topic in ["action", "food", "space", "nature", "people", "abstract"]]
+POOLS += [(topic, FULL) for topic in ["horror", "nature", "food", "abstract", "technology"]]
+
+_filling = threading.Lock()
+
+def pool_dir(topic, size):
+    return os.path.join(POOL_DIR, topic, f"{size[0]}x{size[1]}")
+
+def available(topic, size):
+    d = pool_dir(topic, size)
+    if not os.path.isdir(d):
+        return []
+    return sorted(os.path.join(d, f) for f in os.listdir(d)
+                  if f.endswith(".jpg") and ".download" not in f)
+
+def take(topic, size, dest):
+    """Move one pooled image to `dest` and return it, or None if the pool is empty."""
+    if seeds.enabled():
+        return None
+    for path in available(topic, size):
+        try:
+            os.replace(path, dest)
+        except FileNotFoundError:
+            continue  # another thread took it first
+        except OSError:
+            shutil.move(path, dest)
+        print(f"🗂️ Took a pooled {topic} image ({len(available(topic, size))} left)")
+        return dest
+    return None
+
+# --- FILLING ---
+
+def _download(url, tmp, timeout=30, **kwargs):
+    r = net.get(url, timeout=timeout, **kwargs)
+    if r.status_code != 200 or "image" not in r.headers.get("Content-Type", ""):
+        raise Exception(f"Status {r.status_code}")
+    with open(tmp, 'wb') as f:
+        f.write(r.content)
+
+def _sources(topic, size):
+    w, h = size
+    seed = random.randint(1, 999999)
+    prompt = f"{TOPIC_PROMPTS[topic]}, no text, no logos"
+    photo_id = random.choice(PEXELS_IDS[topic])
+    gray = "&grayscale" if topic == "horror" else ""
+    return [
+        ("Pollinations", (f"https://image.pollinations.ai/prompt/{requests.utils.quote(prompt)}"
+                          f"?width={w}&height={h}&negative={requests.utils.quote(NEGATIVE)}"
+                          f"&nologo=true&seed={seed}")),
+        ("Pexels", (f"https://images.pexels.com/photos/{photo_id}/pexels-photo-{photo_id}.jpeg"
+                    f"?auto=compress&cs=tinysrgb&w={w}&h={h}&random={seed}")),
+        ("Picsum", f"https://picsum.photos/{w}/{h}?random={seed}{gray}"),
+    ]
+
+def fetch_one(topic, size):
+    """Download, validate and cover-resize one image into the pool. Returns its path or None."""
+    d = pool_dir(topic, size)
+    os.makedirs(d, exist_ok=True)
+    name = seeds.digest(topic, size, time.time(), random.random())
+    tmp = os.path.join(d, f"{name}.download")
+    for provider, url in _sources(topic, size):
+        try:
+            # Own health key: background fills must never trip the breaker
+            # the prompt-matched requests go through
+            with provider_health.track(f"Pool:{provider}"):
+                _download(url, tmp, allow_redirects=True)
+            video_format = "horror" if topic == "horror" else None
+            image_check.validate(tmp, video_format=video_format)
+            with Image.open(tmp) as img:
+                img = ImageOps.fit(img.convert("RGB"), size, Image.LANCZOS)
+                img.save(f"{tmp}.jpg", quality=90)
+            # Validated at its final size, then published atomically
+            image_check.validate(f"{tmp}.jpg", size, video_format)
+            path = os.path.join(d, f"{name}.jpg")
+            os.replace(f"{tmp}.jpg", path)
+            return path
+        except Exception as e:
+            print(f"  ⚠️ Pool {topic} {size[0]}x{size[1]}: {provider} failed: {str(e)[:50]}")
+        finally:
+            for leftover in (tmp, f"{tmp}.jpg"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+    return None
+
+def _remove_stale(topic, size):
+    """Drop partial downloads left behind when a fill thread was cut off at exit."""
+    d = pool_dir(topic, size)
+    if not os.path.isdir(d):
+        return
+    cutoff = time.time() - STALE_SECONDS
+    for f in os.listdir(d):
+        path = os.path.join(d, f)
+        try:
+            if ".download" in f and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass  # finished or removed by its own fill meanwhile
+
+def fill(pools=POOLS, target=POOL_TARGET):
+    """Top every pool up to `target` images. Returns how many were added."""
+    if not _filling.acquire(blocking=False):
+        return 0  # a fill is already running in this process
+    added = 0
+    try:
+        for topic, size in pools:
+            _remove_stale(topic, size)
+        for topic, size in pools:
+            missing = target - len(available(topic, size))
+            for _ in range(max(0, missing)):
+                if not fetch_one(topic, size):
+                    break
+                added += 1
+        if added:
+            print(f"🗂️ Image pools topped up (+{added})")
+    finally:
+        _filling.release()
+    return added
+
+def start_background_fill(pools=POOLS, target=POOL_TARGET):
+    """fill() in a daemon thread; returns the thread."""
+    thread = threading.Thread(target=fill, args=(pools, target), daemon=True, name="image-pool-fill")
+    thread.start()
+    return thread
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prefetch topic-pooled background images")
+    parser.add_argument("command", choices=["fill", "status"])
+    parser.add_argument("--target", type=int, default=POOL_TARGET)
+    parser.add_argument("--topics", nargs="+", choices=list(TOPIC_PROMPTS))
+    args = parser.parse_args(argv)
+
+    pools = [p for p in POOLS if not args.topics or p[0] in args.topics]
+    if args.command == "fill":
+        fill(pools, args.target)
+    for topic, size in pools:
+        print(f"  {topic:<11} {size[0]}x{size[1]}  {len(available(topic, size))}/{args.target}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
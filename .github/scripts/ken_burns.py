@@ -0,0 +1,135 @@
+"""
+Mipmapped Ken Burns (slow zoom/pan) background layer.
+
+The source still is decoded, dimmed and reduced into a 2x mip pyramid once.
+Each frame picks the smallest pyramid level that still has at least one
+texel per output pixel, takes a sub-pixel crop of it and resamples with a
+fixed-point bilinear filter in numpy, into preallocated scratch buffers. That
+keeps a moving background close to the cost of a static one, instead of a
+full LANCZOS resize of the original image on every frame.
+
+Plugs into compositor.Compositor as a layer (it implements render_into).
+"""
+import numpy as np
+from PIL import Image
+
+class KenBurnsLayer:
+    def __init__(self, image, size, duration, zoom=(1.0, 1.12), pan=((0.5, 0.5), (0.5, 0.5)),
+                 dim=0.0, start=0.0, end=None):
+        """
+        image: path or PIL image. size: output (W, H).
+        zoom: (start, end) zoom relative to a cover fit of the canvas.
+        pan: (start, end) window centres as fractions of the image.
+        dim: bake a black overlay of this opacity into the pixels (0.6 = darken by 60%).
+        """
+        img = Image.open(image) if isinstance(image, str) else image
+        img = img.convert("RGB")
+        if dim:
+            img = Image.eval(img, lambda v: int(v * (1.0 - dim) + 0.5))
+
+        self.size = size
+        self.duration = duration
+        self.zoom = zoom
+        self.pan = pan
+        self.start = start
+        self.end = end
+        self.pos = None
+
+        W, H = size
+        self.src_w, self.src_h = img.size
+        self.cover = max(W / self.src_w, H / self.src_h)
+
+        # Mip pyramid: halve until a level would be smaller than the canvas.
+        # Levels are kept as uint16 so the filter can gather straight into its
+        # 16-bit fixed-point scratch buffers.
+        self.levels = [np.asarray(img, dtype=np.uint16)]
+        while img.width // 2 >= W and img.height // 2 >= H:
+            img = img.reduce(2)
+            self.levels.append(np.asarray(img, dtype=np.uint16))
+
+        self._rows = np.empty(H * (self.levels[0].shape[1] + 2) * 3, dtype=np.uint16)
+        self._tmp = np.empty_like(self._rows)
+        self._out = np.empty((H, W, 3), dtype=np.uint16)
+        self._out_tmp = np.empty((H, W, 3), dtype=np.uint16)
+
+    # --- compositor layer interface ---
+
+    @property
+    def is_static(self):
+        return False
+
+    def visible(self, t):
+        return t >= self.start and (self.end is None or t < self.end)
+
+    def always_visible(self, duration):
+        return self.start <= 0 and (self.end is None or self.end >= duration)
+
+    # --- motion ---
+
+    def window(self, t):
+        """Source-space crop (x, y, w, h) shown at time t."""
+        p = min(max((t - self.start) / max(self.duration, 1e-6), 0.0), 1.0)
+        p = p * p * (3 - 2 * p)  # smoothstep, so motion eases in and out
+        z = self.zoom[0] + (self.zoom[1] - self.zoom[0]) * p
+        cx = self.pan[0][0] + (self.pan[1][0] - self.pan[0][0]) * p
+        cy = self.pan[0][1] + (self.pan[1][1] - self.pan[0][1]) * p
+
+        W, H = self.size
+        w = W / (self.cover * z)
+        h = H / (self.cover * z)
+        x = min(max(cx * self.src_w - w / 2, 0.0), self.src_w - w)
+        y = min(max(cy * self.src_h - h / 2, 0.0), self.src_h - h)
+        return x, y, w, h
+
+    def _level_for(self, w):
+        """Smallest level that still has >= 1 texel per output pixel."""
+        W = self.size[0]
+        level = 0
+        while level + 1 < len(self.levels) and w / 2 ** (level + 1) >= W:
+            level += 1
+        return level
+
+    @staticmethod
+    def _taps(start, span, count, limit):
+        coords = start + (np.arange(count, dtype=np.float64) + 0.5) * (span / count) - 0.5
+        coords = np.clip(coords, 0, limit - 1)
+        i0 = np.floor(coords).astype(np.intp)
+        i1 = np.minimum(i0 + 1, limit - 1)
+        frac = ((coords - i0) * 256).astype(np.uint16)
+        return i0, i1, frac
+
+    def render_into(self, dst, t):
+        x, y, w, h = self.window(t)
+        level = self._level_for(w)
+        tex = self.levels[level]
+        scale = 0.5 ** level
+        W, H = self.size
+
+        ix0, ix1, fx = self._taps(x * scale, w * scale, W, tex.shape[1])
+        iy0, iy1, fy = self._taps(y * scale, h * scale, H, tex.shape[0])
+
+        # Vertical pass over just the columns this frame touches
+        c0, c1 = ix0[0], ix1[-1] + 1
+        cw = c1 - c0
+        band = tex[:, c0:c1]
+        rows = self._rows[:H * cw * 3].reshape(H, cw, 3)
+        tmp = self._tmp[:H * cw * 3].reshape(H, cw, 3)
+        np.take(band, iy0, axis=0, out=rows, mode='clip')
+        np.take(band, iy1, axis=0, out=tmp, mode='clip')
+        # Weights are applied on 2-D (rows, W*3) views so numpy's inner loop
+        # runs over contiguous memory instead of 3-element channel strides
+        _lerp(rows.reshape(H, -1), tmp.reshape(H, -1), fy[:, None])
+
+        # Horizontal pass into the frame
+        out, out_tmp = self._out, self._out_tmp
+        np.take(rows, ix0 - c0, axis=1, out=out, mode='clip')
+        np.take(rows, ix1 - c0, axis=1, out=out_tmp, mode='clip')
+        _lerp(out.reshape(H, -1), out_tmp.reshape(H, -1), np.repeat(fx, 3)[None, :])
+        np.copyto(dst, out, casting='unsafe')
+
+def _lerp(a, b, f):
+    """a = (a * (256 - f) + b * f) >> 8, in place, with f in [0, 256)."""
+    a *= (256 - f)
+    b *= f
+    a += b
+    a >>= 8
@@ -0,0 +1,32 @@
+"""
+Shared HTTP session.
+
+Every generator goes through here instead of bare requests.get so that a
+single process (the unified runner, the daemon) keeps one warm connection
+pool per host across all three formats.
+
+Set HTTP_CASSETTE=record|replay to run everything (including gTTS) against
+a recorded archive instead of the network; see cassette.py.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+import cassette
+
+cassette.install_from_env()
+
+POOL_SIZE = 16
+
+_session = None
+
+def session():
+    global _session
+    if _session is None:
+        s = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        s.mount("https://", adapter)
+        s.mount("http://", adapter)
+        _session = s
+    return _session
+
+def get(url, **kwargs):
+    return session().get(url, **kwargs)
@@ -0,0 +1,275 @@
+"""
+Streaming renderer: numpy frames straight into a long-lived ffmpeg process.
+
+Frames are composited into a small pool of preallocated uint8 buffers and
+handed to a writer thread, which pushes each one to ffmpeg's stdin as
+rawvideo via a memoryview (no tobytes() copy). The free/filled queues are
+bounded, so the compositor and the encoder overlap but the compositor can
+never run more than `queue_size` frames ahead of ffmpeg (backpressure).
+Audio is passed to the same ffmpeg as a second input and muxed in one go.
+
+One composited stream can feed several renditions: ffmpeg `split`s it and
+each branch is scaled or letterboxed and encoded to its own file, so frames
+are composited once no matter how many outputs are asked for.
+
+Given a `segment_dir` (the run's checkpoint directory), the video is encoded
+in short chunks that survive a crash; a resumed render only encodes the
+chunks that are missing and then joins them with the concat demuxer.
+
+    pipe_render.render(compositor, "out.mp4", audio_path="voice.wav",
+                       renditions=["shorts", "720p", "square"])
+"""
+import os
+import queue
+import hashlib
+import tempfile
+import threading
+import subprocess
+import numpy as np
+
+FFMPEG_BINARY = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+
+# name -> (output size, letterbox). Scaled renditions keep the composited
+# aspect ratio. Letterboxed ones fit the whole frame inside the output over a
+# blurred, zoomed copy of itself: the 9:16 layouts put text from top to
+# bottom, so no fixed crop keeps every header, option and stat on screen.
+RENDITIONS = {
+    "shorts": ((1080, 1920), False),
+    "720p": ((720, 1280), False),
+    "square": ((1080, 1080), True),
+}
+LETTERBOX_BLUR = 270  # the backdrop is blurred at this width, then scaled up
+DEFAULT_RENDITIONS = ["shorts"]
+
+# x264's bitstream depends on its thread count, so bit-exact encodes pin it
+BITEXACT_THREADS = 4
+SEGMENT_SECONDS = 5.0
+
+def rendition_path(output_file, name):
+    """The first-class "shorts" rendition keeps the plain name, others get a suffix."""
+    if name == "shorts":
+        return output_file
+    root, ext = os.path.splitext(output_file)
+    return f"{root}_{name}{ext}"
+
+def plan_outputs(output_file, renditions=None):
+    """[(path, rendition name)] for `output_file` rendered at each of `renditions`."""
+    names = list(renditions or DEFAULT_RENDITIONS)
+    unknown = [n for n in names if n not in RENDITIONS]
+    if unknown:
+        raise ValueError(f"Unknown rendition(s) {unknown}, expected {list(RENDITIONS)}")
+    return [(rendition_path(output_file, n), n) for n in names]
+
+def _rendition_filter(name, size, tag="r"):
+    """ffmpeg filter chain turning the composited frame into rendition `name` (or None).
+
+    `tag` keeps the chain's internal pad labels unique within one filter graph.
+    """
+    W, H = size
+    (out_w, out_h), letterbox = RENDITIONS[name]
+    if letterbox and W * out_h != H * out_w:
+        scale = min(out_w / W, out_h / H)
+        fg_w, fg_h = int(W * scale) // 2 * 2, int(H * scale) // 2 * 2
+        blur_h = max(2, LETTERBOX_BLUR * out_h // out_w // 2 * 2)
+        return (f"split[{tag}bg][{tag}fg];"
+                f"[{tag}bg]scale={LETTERBOX_BLUR}:{blur_h}:force_original_aspect_ratio=increase,"
+                f"crop={LETTERBOX_BLUR}:{blur_h},boxblur=12:2,scale={out_w}:{out_h},eq=brightness=-0.15[{tag}b];"
+                f"[{tag}fg]scale={fg_w}:{fg_h}:flags=lanczos[{tag}f];"
+                f"[{tag}b][{tag}f]overlay={(out_w - fg_w) // 2}:{(out_h - fg_h) // 2}")
+    if (W, H) != (out_w, out_h):
+        return f"scale={out_w}:{out_h}:flags=lanczos"
+    return None
+
+class FramePipe:
+    def __init__(self, outputs, size, fps=24, audio_path=None, threads=4,
+                 preset='fast', queue_size=8, bitexact=False):
+        """
+        outputs: an output path, or [(path, rendition name)] from plan_outputs()
+        to encode several renditions of the same frames in one ffmpeg.
+        bitexact: strip version/time metadata and pin encoder threads, so the
+        same frames and audio always give byte-identical files.
+        """
+        if isinstance(outputs, str):
+            outputs = [(outputs, None)]
+        self.outputs = outputs
+        self.output_file = ", ".join(path for path, _ in outputs)
+        self.size = size
+        self.fps = fps
+        W, H = size
+
+        self._free = queue.Queue()
+        self._filled = queue.Queue(maxsize=queue_size)
+        for _ in range(queue_size + 2):
+            self._free.put(np.empty((H, W, 3), dtype=np.uint8))
+
+        cmd = [
+            FFMPEG_BINARY, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{W}x{H}', '-r', str(fps), '-i', '-',
+        ]
+        if audio_path:
+            cmd += ['-i', audio_path]
+
+        # Fan the single raw stream out to every rendition
+        graph = []
+        if len(outputs) > 1:
+            graph.append(f"[0:v]split={len(outputs)}" + "".join(f"[s{i}]" for i in range(len(outputs))))
+        video_maps = []
+        for i, (_, name) in enumerate(outputs):
+            src = f"[s{i}]" if len(outputs) > 1 else "[0:v]"
+            chain = _rendition_filter(name, size, tag=f"r{i}") if name else None
+            if chain:
+                graph.append(f"{src}{chain}[v{i}]")
+                video_maps.append(f"[v{i}]")
+            else:
+                video_maps.append(src if len(outputs) > 1 else "0:v")
+        if graph:
+            cmd += ['-filter_complex', ";".join(graph)]
+
+        if bitexact:
+            threads = BITEXACT_THREADS
+        for (path, _), video in zip(outputs, video_maps):
+            cmd += ['-map', video]
+            if audio_path:
+                cmd += ['-map', '1:a', '-c:a', 'aac']
+            cmd += ['-c:v', 'libx264', '-preset', preset, '-threads', str(threads), '-pix_fmt', 'yuv420p']
+            if bitexact:
+                cmd += ['-map_metadata', '-1', '-fflags', '+bitexact',
+                        '-flags:v', '+bitexact', '-flags:a', '+bitexact']
+            cmd += [path]
+
+        self._stderr = tempfile.TemporaryFile()
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=self._stderr)
+        self._error = None
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            buf = self._filled.get()
+            if buf is None:
+                break
+            try:
+                if self._error is None:
+                    self._proc.stdin.write(memoryview(buf).cast('B'))
+            except (BrokenPipeError, OSError) as e:
+                self._error = e
+            finally:
+                self._free.put(buf)
+
+    def buffer(self):
+        """Get a free frame buffer; blocks while the encoder is behind."""
+        if self._error is not None:
+            raise IOError(f"ffmpeg stopped accepting frames: {self._ffmpeg_log()}")
+        return self._free.get()
+
+    def submit(self, buf):
+        self._filled.put(buf)
+
+    def _ffmpeg_log(self):
+        self._stderr.seek(0)
+        return self._stderr.read().decode('utf-8', 'replace').strip()[-500:]
+
+    def close(self):
+        self._filled.put(None)
+        self._writer.join()
+        self._proc.stdin.close()
+        code = self._proc.wait()
+        log = self._ffmpeg_log()
+        self._stderr.close()
+        if code != 0 or self._error is not None:
+            raise IOError(f"ffmpeg failed ({code}) writing {self.output_file}: {log}")
+
+    def abort(self):
+        self._filled.put(None)
+        self._writer.join()
+        self._proc.kill()
+        self._proc.wait()
+        self._stderr.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def frame_times(duration, fps):
+    """Same frame timeline MoviePy uses: np.arange(0, duration, 1/fps)."""
+    return np.arange(0, duration, 1.0 / fps)
+
+def _stream(source, outputs, times, fps, audio_path=None, **kwargs):
+    with FramePipe(outputs, source.size, fps=fps, audio_path=audio_path, **kwargs) as pipe:
+        for t in times:
+            buf = pipe.buffer()
+            source.make_frame(t, out=buf)
+            pipe.submit(buf)
+
+def _concat(segments, output_file, audio_path=None, bitexact=False):
+    """Join encoded segments without re-encoding and mux the audio in."""
+    list_file = f"{output_file}.segments.txt"
+    with open(list_file, 'w') as f:
+        for seg in segments:
+            f.write(f"file '{os.path.abspath(seg)}'\n")
+    cmd = [FFMPEG_BINARY, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_file]
+    if audio_path:
+        cmd += ['-i', audio_path, '-map', '0:v', '-map', '1:a', '-c:a', 'aac']
+    cmd += ['-c:v', 'copy']
+    if bitexact:
+        cmd += ['-map_metadata', '-1', '-fflags', '+bitexact', '-flags:a', '+bitexact']
+    proc = subprocess.run(cmd + [output_file], capture_output=True)
+    os.remove(list_file)
+    if proc.returncode != 0:
+        raise IOError(f"ffmpeg concat failed ({proc.returncode}) for {output_file}: "
+                      f"{proc.stderr.decode('utf-8', 'replace').strip()[-500:]}")
+
+def render(source, output_file, audio_path=None, fps=24, threads=4, preset='fast', queue_size=8,
+           renditions=None, bitexact=False, segment_dir=None, segment_key=None):
+    """
+    Render a frame source (anything with .size, .duration and make_frame(t, out))
+    to `output_file` at each of `renditions`, muxing `audio_path` if given.
+    Returns the written paths, in rendition order.
+
+    With `segment_dir`, frames are encoded in SEGMENT_SECONDS chunks that are
+    kept there and joined at the end; a rerun skips every finished chunk.
+    `segment_key` must identify the content (checkpoint.inputs_key), so a
+    rerun with a different scenario, voice or image never reuses old chunks.
+    """
+    outputs = plan_outputs(output_file, renditions)
+    times = frame_times(source.duration, fps)
+    names = [name for _, name in outputs]
+    options = dict(threads=threads, preset=preset, queue_size=queue_size, bitexact=bitexact)
+
+    if not segment_dir:
+        print(f"🎞️ Streaming {len(times)} frames to ffmpeg -> {', '.join(names)}")
+        _stream(source, outputs, times, fps, audio_path=audio_path, **options)
+        return [path for path, _ in outputs]
+
+    # Chunks are only reusable for the same content, timeline and encoder settings
+    key = hashlib.sha256(repr((segment_key, source.size, len(times), fps, preset, bitexact)).encode()).hexdigest()[:12]
+    segment_dir = os.path.join(segment_dir, key)
+    os.makedirs(segment_dir, exist_ok=True)
+    per_segment = max(1, int(round(SEGMENT_SECONDS * fps)))
+    segments = {name: [] for name in names}
+    reused = 0
+
+    print(f"🎞️ Streaming {len(times)} frames in {per_segment}-frame segments -> {', '.join(names)}")
+    for k, first in enumerate(range(0, len(times), per_segment)):
+        seg = [(os.path.join(segment_dir, f"seg{k:04d}_{name}.mp4"), name) for name in names]
+        for path, name in seg:
+            segments[name].append(path)
+        if all(os.path.exists(path) for path, _ in seg):
+            reused += 1
+            continue
+        # Written under a temporary name and renamed, so a file that exists is complete
+        parts = [(f"{path[:-4]}.part.mp4", name) for path, name in seg]
+        _stream(source, parts, times[first:first + per_segment], fps, **options)
+        for (part, _), (path, _) in zip(parts, seg):
+            os.replace(part, path)
+
+    if reused:
+        print(f"♻️ Reused {reused} rendered segments")
+    for path, name in outputs:
+        _concat(segments[name], path, audio_path=audio_path, bitexact=bitexact)
+    return [path for path, _ in outputs]
@@ -0,0 +1,202 @@
+"""
+Circuit breakers and health stats for the image providers and pullpush.
+
+Every call to an outside provider goes through `track(name)`, which times
+it and records success or failure. Stats persist in data/provider_health.json
+so a provider that died yesterday is not waited on again today:
+
+- closed: calls go through. FAILURE_THRESHOLD failures in a row open it.
+- open: calls are skipped (CircuitOpen) until `retry_at`.
+- half-open: after the cooldown one probe call is let through. Success
+  closes the breaker; failure re-opens it with a doubled cooldown.
+
+`order()` sorts providers by expected time to a usable result
+(mean latency / success rate), keeping any `pinned` providers first.
+
+In deterministic mode (seeds.py) the saved stats must not steer a run:
+providers keep their listed order and open breakers are ignored (calls
+are still timed and recorded).
+
+Several processes (run_all workers, the render daemon) share the file, so
+each save re-reads it under a file lock and merges in the samples other
+processes recorded before replacing it.
+
+    with provider_health.track("Pexels"):
+        result = fetch()
+"""
+import os
+import json
+import time
+import fcntl
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+import seeds
+
+BASE_DIR = os.getcwd()
+HEALTH_FILE = os.path.join(BASE_DIR, "data", "provider_health.json")
+# Cassette replays keep their own stats, so injected failures never trip the real breakers
+if os.environ.get("HTTP_CASSETTE", "").lower() == "replay":
+    HEALTH_FILE = os.path.join(BASE_DIR, ".cache", "http", "provider_health.json")
+
+FAILURE_THRESHOLD = 3
+COOLDOWN_SECONDS = 6 * 3600
+MAX_COOLDOWN_SECONDS = 7 * 24 * 3600
+MAX_SAMPLES = 50
+DEFAULT_LATENCY = 5.0  # seconds, assumed for providers without samples yet
+
+class CircuitOpen(Exception):
+    pass
+
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+class HealthTracker:
+    def __init__(self, path=HEALTH_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.providers = self._load()
+        self._probing = set()
+        self._dirty = set()  # providers recorded by this process
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f).get("providers", {})
+        except (OSError, ValueError):
+            return {}
+
+    def _entry(self, name):
+        return self.providers.setdefault(name, {
+            "state": "closed",
+            "consecutive_failures": 0,
+            "cooldown": COOLDOWN_SECONDS,
+            "retry_at": 0,
+            "last_failure": None,
+            "samples": [],
+        })
+
+    def allow(self, name):
+        """True if a call to `name` should be attempted now."""
+        with self.lock:
+            entry = self._entry(name)
+            if entry["state"] == "closed":
+                return True
+            if name in self._probing or time.time() < entry["retry_at"]:
+                return False
+            entry["state"] = "half-open"
+            self._probing.add(name)
+            return True
+
+    def record(self, name, ok, latency, error=None):
+        with self.lock:
+            entry = self._entry(name)
+            self._probing.discard(name)
+            self._dirty.add(name)
+            entry["samples"] = (entry["samples"] + [[round(time.time()), round(latency, 3), ok]])[-MAX_SAMPLES:]
+
+            if ok:
+                entry["state"] = "closed"
+                entry["consecutive_failures"] = 0
+                entry["cooldown"] = COOLDOWN_SECONDS
+            else:
+                entry["consecutive_failures"] += 1
+                entry["last_failure"] = {"at": round(time.time()), "error": str(error)[:200]}
+                if entry["state"] == "half-open":
+                    entry["cooldown"] = min(entry["cooldown"] * 2, MAX_COOLDOWN_SECONDS)
+                if entry["state"] == "half-open" or entry["consecutive_failures"] >= FAILURE_THRESHOLD:
+                    if entry["state"] != "open":
+                        print(f"🔌 {name} circuit open for {entry['cooldown'] // 3600}h ({str(error)[:60]})")
+                    entry["state"] = "open"
+                    entry["retry_at"] = round(time.time() + entry["cooldown"])
+            self._summarize(entry)
+            self._save()
+
+    def _summarize(self, entry):
+        samples = entry["samples"]
+        ok_latencies = [s[1] for s in samples if s[2]]
+        entry["success_rate"] = round(len(ok_latencies) / len(samples), 3) if samples else None
+        entry["p50"] = _percentile(ok_latencies, 0.5)
+        entry["p95"] = _percentile(ok_latencies, 0.95)
+
+    def _merge(self, on_disk):
+        """Fold another process's saved stats into ours: samples are unioned,
+        breaker state comes from whichever side recorded last."""
+        for name, theirs in on_disk.items():
+            ours = self.providers.get(name)
+            if ours is None or name not in self._dirty:
+                self.providers[name] = theirs
+                continue
+            # Max count per sample: the ones both sides loaded count once
+            samples = Counter(map(tuple, ours["samples"])) | Counter(map(tuple, theirs.get("samples", [])))
+            merged = dict(theirs) if theirs.get("samples", [[0]])[-1][0] > ours["samples"][-1][0] else ours
+            merged["samples"] = [list(s) for s in sorted(samples.elements())][-MAX_SAMPLES:]
+            self._summarize(merged)
+            self.providers[name] = merged
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(f"{self.path}.lock", 'w') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                self._merge(self._load())
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp, 'w') as f:
+                    json.dump({"updated": round(time.time()), "providers": self.providers}, f, indent=2, sort_keys=True)
+                os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not save provider health: {e}")
+
+    def expected_cost(self, name):
+        """Expected seconds spent per usable result: mean latency / success rate."""
+        samples = self.providers.get(name, {}).get("samples", [])
+        if not samples:
+            return DEFAULT_LATENCY
+        mean = sum(s[1] for s in samples) / len(samples)
+        successes = sum(1 for s in samples if s[2])
+        return mean / max(successes / len(samples), 0.05)
+
+    def order(self, providers, pinned=()):
+        """Sort [(name, fn)] by expected cost; names in `pinned` keep their place up front."""
+        if seeds.enabled():
+            return list(providers)
+        head = [p for p in providers if p[0] in pinned]
+        rest = [p for p in providers if p[0] not in pinned]
+        rest.sort(key=lambda p: self.expected_cost(p[0]))
+        return head + rest
+
+    @contextmanager
+    def track(self, name):
+        """Time the enclosed call and record it; raises CircuitOpen if `name` is tripped."""
+        if not seeds.enabled() and not self.allow(name):
+            if name in self._probing:
+                raise CircuitOpen("half-open probe already in flight")
+            wait = max(0, self.providers[name]["retry_at"] - time.time())
+            raise CircuitOpen(f"circuit open, next probe in {wait / 3600:.1f}h")
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.record(name, False, time.perf_counter() - start, e)
+            raise
+        self.record(name, True, time.perf_counter() - start)
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+def tracker():
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = HealthTracker()
+    return _tracker
+
+def track(name):
+    return tracker().track(name)
+
+def order(providers, pinned=()):
+    return tracker().order(providers, pinned)
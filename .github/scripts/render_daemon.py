@@ -0,0 +1,295 @@
+"""
+On-demand render daemon.
+
+Keeps the TTS model, glyph atlases, HTTP pool and render workers warm and
+watches a spool directory for JSON job files, so a hand-picked scenario
+renders without paying a cold start:
+
+    python .github/scripts/render_daemon.py serve [--spool spool] [--concurrency 2]
+    python .github/scripts/render_daemon.py submit wyr '{"option_a": "...", "option_b": "..."}' --priority 5
+
+A job file (spool/<job id>.json) holds the scenario in the shape the
+format's render function takes:
+
+    {"format": "wyr",    "data": {"option_a": ..., "option_b": ..., "stats": [60, 40]}}
+    {"format": "horror", "data": {"setup": ..., "punchline": ...}}
+    {"format": "fact",   "data": {"text": ...}}
+
+plus optional "priority" (higher runs first), "renditions" and "history"
+(true to add the ID to the format's history). The daemon writes "status"
+(queued/running/done/failed), "timings", "outputs" and "error" back into
+the same file. Every job is checkpointed, so a daemon restart resumes
+half-finished jobs. While the spool is idle the topic image pools
+(image_pool.py) are topped up.
+"""
+import os
+import json
+import time
+import heapq
+import argparse
+import importlib
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import seeds
+import checkpoint
+import image_pool
+from run_all import FORMATS
+
+BASE_DIR = os.getcwd()
+SPOOL_DIR = os.path.join(BASE_DIR, "spool")
+POLL_SECONDS = 1.0
+IDLE_FILL_SECONDS = 30  # idle time before topping up the image pools
+
+REQUIRED_FIELDS = {
+    "wyr": ["option_a", "option_b"],
+    "horror": ["setup", "punchline"],
+    "fact": ["text"],
+}
+
+# --- JOB FILES ---
+
+def read_job(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def write_job(path, job):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(job, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def submit(spool, fmt, data, priority=0, renditions=None, history=False):
+    """Drop a job into the spool. Returns its path."""
+    job = {"format": fmt, "data": data, "priority": priority, "renditions": renditions,
+           "history": history, "status": "queued", "submitted_at": time.time()}
+    job_id = data.get("id") or seeds.stable_id(f"{fmt}_job", json.dumps(data, sort_keys=True), time.time())
+    os.makedirs(spool, exist_ok=True)
+    path = os.path.join(spool, f"{job_id}.json")
+    write_job(path, job)
+    return path
+
+# --- RENDER WORKERS ---
+
+def _warm_worker():
+    """Pay the render-side imports and atlas loads once per worker process."""
+    import compositor
+    import pipe_render
+    import ken_burns
+    import glyph_atlas
+    for size in glyph_atlas.SIZES:
+        glyph_atlas.get_atlas(size)
+
+def _render_job(module_name, data, audio_path, images, threads, renditions, workdir):
+    module = importlib.import_module(module_name)
+    return module.render(data, audio_path, images, threads=threads, renditions=renditions, workdir=workdir)
+
+# --- DAEMON ---
+
+class RenderDaemon:
+    def __init__(self, spool=SPOOL_DIR, concurrency=2, threads=None):
+        self.spool = spool
+        self.concurrency = concurrency
+        self.threads = threads or max(1, (os.cpu_count() or 1) // concurrency)
+        self.queue = []
+        self.known = set()
+        self.running = 0
+        self.lock = threading.Lock()
+        self.voice_lock = threading.Lock()  # one synthesis at a time on the shared TTS pool
+        # History files are read-modify-write; one save at a time per format
+        self.history_locks = {name: threading.Lock() for name in FORMATS}
+        self.modules = {}
+        self.idle_since = time.time()
+        self.jobs = ThreadPoolExecutor(max_workers=concurrency)
+        self.renderers = ProcessPoolExecutor(max_workers=concurrency,
+                                             mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_warm_worker)
+
+    def warm_up(self):
+        start = time.perf_counter()
+        for name, (module_name, _) in FORMATS.items():
+            module = importlib.import_module(module_name)
+            module.setup_dirs()
+            self.modules[name] = module
+        import net
+        net.session()
+        try:
+            import tts_engine
+            if tts_engine.TTS_WORKERS < 2:
+                tts_engine.get_pipeline()
+            else:
+                tts_engine.get_pool()
+        except Exception as e:
+            print(f"⚠️ TTS warm-up failed ({str(e)[:80]}), voices will fall back to gTTS")
+        # Start every render worker now rather than on the first job
+        list(self.renderers.map(time.sleep, [0] * self.concurrency))
+        print(f"🔥 Warm in {time.perf_counter() - start:.1f}s "
+              f"({self.concurrency} workers x {self.threads} threads, spool {self.spool})")
+
+    def scan(self):
+        """Queue new job files, and re-queue jobs a previous daemon left running."""
+        os.makedirs(self.spool, exist_ok=True)
+        for name in sorted(os.listdir(self.spool)):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.spool, name)
+            if path in self.known:
+                continue
+            try:
+                job = read_job(path)
+            except (OSError, ValueError):
+                continue  # still being written; try again next poll
+            if job.get("status") in ("done", "failed"):
+                self.known.add(path)
+                continue
+
+            problem = self.validate(job)
+            if problem:
+                job.update(status="failed", error=problem)
+                write_job(path, job)
+                print(f"❌ {name}: {problem}")
+                self.known.add(path)
+                continue
+
+            job["status"] = "queued"
+            job.setdefault("submitted_at", os.path.getmtime(path))
+            write_job(path, job)
+            self.known.add(path)
+            heapq.heappush(self.queue, (-int(job.get("priority", 0)), job["submitted_at"], path))
+            print(f"📥 Queued {name} ({job['format']}, priority {job.get('priority', 0)})")
+
+    @staticmethod
+    def validate(job):
+        fmt = job.get("format")
+        if fmt not in FORMATS:
+            return f"unknown format {fmt!r}, expected one of {list(FORMATS)}"
+        data = job.get("data")
+        if not isinstance(data, dict):
+            return "job needs a 'data' object"
+        missing = [k for k in REQUIRED_FIELDS[fmt] if not data.get(k)]
+        if missing:
+            return f"data is missing {missing}"
+        return None
+
+    def dispatch(self):
+        with self.lock:
+            while self.queue and self.running < self.concurrency:
+                _, _, path = heapq.heappop(self.queue)
+                self.running += 1
+                self.jobs.submit(self.run_job, path)
+
+    def run_job(self, path):
+        job_id = os.path.splitext(os.path.basename(path))[0]
+        job, timings = {}, {}
+        start = time.perf_counter()
+        # Everything is inside the try: an exception escaping here would be
+        # swallowed by the executor and leak a concurrency slot
+        try:
+            job = read_job(path)
+            fmt, module = job["format"], self.modules[job["format"]]
+            data = dict(job["data"], id=job["data"].get("id", job_id))
+            if fmt == "wyr":
+                data.setdefault("stats", [50, 50])
+
+            timings["waited"] = round(time.time() - job.get("submitted_at", time.time()), 2)
+            job.update(status="running", started_at=time.time(), timings=timings, error=None)
+            write_job(path, job)
+            print(f"🎬 [{job_id}] {fmt} started")
+
+            run = checkpoint.Run(fmt, key=f"job-{job_id}")
+            t = time.perf_counter()
+            images = run.stage("images", lambda: module.prefetch_assets(data), files=True)
+            timings["images"] = round(time.perf_counter() - t, 2)
+
+            t = time.perf_counter()
+            audio_file = os.path.join(run.dir, f"voice-{job_id}.wav")
+            with self.voice_lock:
+                audio_path = run.stage("audio", lambda: module.voice_over(data, audio_file), files=True)
+            timings["tts"] = round(time.perf_counter() - t, 2)
+
+            t = time.perf_counter()
+            renditions = job.get("renditions")
+            outputs = run.stage("render", lambda: self.renderers.submit(
+                _render_job, FORMATS[fmt][0], data, audio_path, images, self.threads, renditions, run.dir).result(),
+                files=True, key=renditions)
+            timings["render"] = round(time.perf_counter() - t, 2)
+
+            if job.get("history"):
+                with self.history_locks[fmt]:
+                    getattr(module, FORMATS[fmt][1])().save_history(data['id'])
+            run.finish()
+            job.update(status="done", outputs=outputs)
+            print(f"✅ [{job_id}] done: {', '.join(outputs)}")
+        except Exception as e:
+            job.update(status="failed", error=str(e)[:500])
+            print(f"❌ [{job_id}] failed: {str(e)[:200]}")
+        finally:
+            timings["total"] = round(time.perf_counter() - start, 2)
+            job.update(finished_at=time.time(), timings=timings)
+            try:
+                write_job(path, job)
+            except OSError as e:
+                print(f"⚠️ [{job_id}] could not update the job file: {e}")
+            with self.lock:
+                self.running -= 1
+                self.idle_since = time.time()
+
+    def fill_when_idle(self):
+        """Top up the image pools once nothing has run for IDLE_FILL_SECONDS."""
+        if self.queue or self.running or seeds.enabled():
+            return
+        if time.time() - self.idle_since >= IDLE_FILL_SECONDS:
+            image_pool.start_background_fill()
+            self.idle_since = time.time()
+
+    def serve(self, poll=POLL_SECONDS, once=False):
+        self.warm_up()
+        print(f"👀 Watching {self.spool} for jobs...")
+        try:
+            while True:
+                self.scan()
+                self.dispatch()
+                if once and not self.queue and not self.running:
+                    break
+                self.fill_when_idle()
+                time.sleep(poll)
+        except KeyboardInterrupt:
+            print("🛑 Stopping; running jobs will finish first")
+        finally:
+            self.jobs.shutdown(wait=True)
+            self.renderers.shutdown(wait=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm render daemon fed by a spool directory of JSON jobs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="watch the spool and render jobs")
+    serve.add_argument("--spool", default=SPOOL_DIR)
+    serve.add_argument("--concurrency", type=int, default=2, help="jobs rendering at the same time")
+    serve.add_argument("--threads", type=int, help="encoder threads per job (default: cores / concurrency)")
+    serve.add_argument("--poll", type=float, default=POLL_SECONDS)
+    serve.add_argument("--once", action="store_true", help="exit when the spool is drained")
+    serve.add_argument("--deterministic", action="store_true")
+
+    add = sub.add_parser("submit", help="add a job to the spool")
+    add.add_argument("format", choices=list(FORMATS))
+    add.add_argument("data", help="scenario JSON, e.g. '{\"text\": \"...\"}'")
+    add.add_argument("--priority", type=int, default=0)
+    add.add_argument("--renditions", nargs="+", metavar="NAME")
+    add.add_argument("--history", action="store_true", help="record the ID in the format's history")
+    add.add_argument("--spool", default=SPOOL_DIR)
+
+    args = parser.parse_args(argv)
+    if args.command == "submit":
+        path = submit(args.spool, args.format, json.loads(args.data), args.priority, args.renditions, args.history)
+        print(f"📨 {path}")
+        return 0
+
+    if args.deterministic:
+        seeds.enable()
+    RenderDaemon(args.spool, max(1, args.concurrency), args.threads).serve(args.poll, args.once)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,189 @@
+"""
+Unified triple-format runner: WYR, Mythica horror and Fake-or-Real in one process.
+
+Content scraping and image downloads for the three formats run concurrently
+on the shared HTTP session, voices are synthesized on the shared (warm) TTS
+pool, and the three renders run side by side in worker processes that split
+the core budget. Each format is isolated: a failure in one is reported and
+the others still render and get their history written.
+
+Every stage is checkpointed per format (see checkpoint.py), so rerunning
+after a crash or preemption picks up at the first unfinished stage.
+Formats whose history is already written are skipped outright, and the
+work dirs are only dropped once every format succeeded; the exit status is
+non-zero if any format failed, so CI offers "Re-run failed jobs". The topic
+image pools (image_pool.py) are topped up in the background.
+
+    python .github/scripts/run_all.py [--formats wyr horror fact] [--cores N]
+                                      [--renditions shorts 720p square] [--deterministic]
+"""
+import os
+import time
+import argparse
+import importlib
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import seeds
+import checkpoint
+import image_pool
+
+FILL_JOIN_SECONDS = 120  # how long the batch waits at exit for the pool fill
+
+FORMATS = {
+    "wyr": ("auto_generate", "AutoContentManager"),
+    "horror": ("generate_scary_short", "HorrorContentManager"),
+    "fact": ("generate_weird_fact", "FactManager"),
+}
+
+class FormatRun:
+    def __init__(self, name):
+        self.name = name
+        module_name, manager_name = FORMATS[name]
+        self.module = importlib.import_module(module_name)
+        self.manager = getattr(self.module, manager_name)()
+        self.ckpt = checkpoint.Run(name)
+        self.data = None
+        self.images = []
+        self.audio_path = None
+        self.video_paths = []
+        self.error = None
+        self.timings = {}
+
+    def fail(self, stage, e):
+        self.error = f"{stage}: {e}"
+        print(f"❌ [{self.name}] {stage} failed: {str(e)[:200]}")
+
+def _render_job(module_name, data, audio_path, images, threads, renditions, workdir):
+    module = importlib.import_module(module_name)
+    return module.render(data, audio_path, images, threads=threads, renditions=renditions, workdir=workdir)
+
+def _timed(run, stage, fn, *args):
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        run.timings[stage] = round(time.perf_counter() - start, 2)
+
+def acquire(run):
+    """Scrape content and download backgrounds (network-bound, runs in a thread)."""
+    try:
+        run.data = _timed(run, "content", run.ckpt.stage, "content", run.manager.get_content)
+        run.images = _timed(run, "images", run.ckpt.stage, "images",
+                            lambda: run.module.prefetch_assets(run.data), True)
+    except Exception as e:
+        run.fail("acquire", e)
+    return run
+
+def voice(run):
+    """Synthesize on the shared TTS pool; runs in the main thread one format at a time."""
+    if run.error:
+        return
+    try:
+        run.audio_path = _timed(run, "tts", run.ckpt.stage, "audio",
+                                lambda: run.module.voice_over(run.data), True)
+    except Exception as e:
+        run.fail("tts", e)
+
+def render_all(runs, cores, renditions=None):
+    ready = []
+    for run in runs:
+        if run.error:
+            continue
+        if run.ckpt.done("render", renditions):
+            print(f"⏭️ [{run.name}] render: done in an earlier attempt")
+            run.video_paths = run.ckpt.value("render")
+        else:
+            ready.append(run)
+    if not ready:
+        return
+    workers = min(len(ready), cores)
+    threads = max(1, cores // workers)
+    print(f"🎬 Rendering {len(ready)} videos on {workers} workers x {threads} threads...")
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = {}
+        for run in ready:
+            run.timings["render_start"] = time.perf_counter()
+            futures[run] = pool.submit(_render_job, FORMATS[run.name][0], run.data, run.audio_path,
+                                       run.images, threads, renditions, run.ckpt.dir)
+        for run, future in futures.items():
+            try:
+                run.video_paths = run.ckpt.record("render", future.result(), files=True, key=renditions)
+            except Exception as e:
+                run.fail("render", e)
+            run.timings["render"] = round(time.perf_counter() - run.timings.pop("render_start"), 2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render WYR, horror and fact videos in one warm process")
+    parser.add_argument("--formats", nargs="+", choices=list(FORMATS), default=list(FORMATS))
+    parser.add_argument("--cores", type=int, default=os.cpu_count() or 1, help="core budget shared by the renders")
+    parser.add_argument("--renditions", nargs="+", metavar="NAME",
+                        help="outputs per video from one composition pass: shorts 720p square")
+    parser.add_argument("--deterministic", action="store_true",
+                        help="seed all randomness from the content so reruns are byte-identical")
+    args = parser.parse_args(argv)
+    if args.deterministic:
+        seeds.enable()
+
+    runs = [FormatRun(name) for name in args.formats]
+    for run in runs:
+        run.module.setup_dirs()
+
+    # A rerun under the same run key must not scrape, render and record a
+    # second video for formats an earlier attempt already completed
+    pending = []
+    for run in runs:
+        if run.ckpt.done("history") and run.ckpt.done("render", args.renditions):
+            print(f"⏭️ [{run.name}] finished in an earlier attempt")
+            run.data = run.ckpt.value("content")
+            run.video_paths = run.ckpt.value("render")
+        else:
+            pending.append(run)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+            list(pool.map(acquire, pending))
+
+    # Top up the fallback image pools for the next batch while this one
+    # synthesizes and renders; started only now so the fill never competes
+    # with the prompt-matched image requests (pool images are never used
+    # in deterministic mode, so there is nothing to fetch then)
+    filler = None if seeds.enabled() else image_pool.start_background_fill()
+
+    for run in pending:
+        voice(run)
+
+    render_all(pending, max(1, args.cores), args.renditions)
+
+    # History for every format that produced a video, written together and
+    # marked in the manifest so a rerun skips the format
+    for run in pending:
+        if run.video_paths:
+            run.manager.save_history(run.data['id'])
+            run.ckpt.record("history", run.data['id'])
+            run.module.cleanup(run.audio_path)
+
+    # Work dirs go only once the whole batch is done; until then a rerun
+    # resumes the failed formats and skips the finished ones
+    ok = all(r.video_paths for r in runs)
+    if ok:
+        for run in runs:
+            run.ckpt.finish()
+
+    print("\n📋 Summary")
+    for run in runs:
+        status = f"✅ {', '.join(run.video_paths)}" if run.video_paths else f"❌ {run.error}"
+        print(f"  {run.name:<7} {status}  {run.timings}")
+
+    # Let the fill finish its current image instead of dying mid-write at
+    # exit; whatever it still leaves behind is cleared by the next fill()
+    if filler:
+        filler.join(FILL_JOIN_SECONDS)
+        if filler.is_alive():
+            print(f"⚠️ Image pool fill still running after {FILL_JOIN_SECONDS}s, leaving it")
+
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+"""
+Revalidating response cache for the pullpush searches.
+
+The content managers run the same top-by-score queries every day. Instead
+of re-downloading and re-parsing the full listing each time, every query
+keeps an entry in .cache/pullpush/<digest>.json holding the server's
+validators and a parsed, history-filtered view of the results:
+
+- ETag / Last-Modified given: each search sends a conditional request, and
+  a 304 reuses the stored view (one round-trip, no JSON parsing).
+- Cache-Control max-age given: the view is reused without a request until
+  it expires.
+- No validators: the view is reused for TTL_SECONDS, then refetched.
+
+If pullpush fails, a stored view is served stale rather than dropping to
+the offline backups.
+
+    candidates = search_cache.search(url, params, parse_post, history)
+
+`parse(post)` turns one raw post into a candidate dict with an "id", or
+None to drop it. Seen IDs only ever join the history, so they are dropped
+from the stored view for good.
+"""
+import os
+import re
+import json
+import time
+import datetime
+
+import net
+import seeds
+import provider_health
+
+BASE_DIR = os.getcwd()
+CACHE_DIR = os.path.join(BASE_DIR, ".cache", "pullpush")
+# Cassette replays keep their own entries, so replayed validators never meet live ones
+if os.environ.get("HTTP_CASSETTE", "").lower() == "replay":
+    CACHE_DIR = os.path.join(BASE_DIR, ".cache", "http", "pullpush")
+
+TTL_SECONDS = 6 * 3600
+
+def entry_path(url, params):
+    return os.path.join(CACHE_DIR, f"{seeds.digest(url, json.dumps(params, sort_keys=True))}.json")
+
+def load(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save(path, entry):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(entry, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def _max_age(headers):
+    match = re.search(r"max-age=(\d+)", headers.get("Cache-Control", ""))
+    if match and "no-cache" not in headers.get("Cache-Control", ""):
+        return int(match.group(1))
+    return None
+
+def _fresh(entry, now):
+    if entry.get("max_age") is not None:
+        return now < entry["fetched_at"] + entry["max_age"]
+    if entry.get("etag") or entry.get("last_modified"):
+        return False  # always revalidate; a 304 is cheap
+    return now < entry["fetched_at"] + TTL_SECONDS
+
+def _unseen(view, history):
+    seen = set(history)
+    return [c for c in view if c["id"] not in seen]
+
+def search(url, params, parse, history=(), timeout=15):
+    """Parsed, unseen candidates for one pullpush query, best first."""
+    path = entry_path(url, params)
+    entry = load(path)
+    now = time.time()
+
+    if entry and _fresh(entry, now):
+        age = (now - entry["fetched_at"]) / 3600
+        print(f"♻️ Cached {params.get('subreddit', 'pullpush')} results ({age:.1f}h old)")
+        return _unseen(entry["view"], history)
+
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        with provider_health.track("pullpush"):
+            r = net.get(url, params=params, headers=headers, timeout=timeout)
+            if r.status_code != 304 or not entry:
+                r.raise_for_status()
+                posts = r.json().get('data', [])
+    except Exception:
+        if not entry:
+            raise
+        print(f"⚠️ pullpush unavailable, using cached {params.get('subreddit', 'pullpush')} results")
+        return _unseen(entry["view"], history)
+
+    if r.status_code == 304:
+        print(f"♻️ {params.get('subreddit', 'pullpush')} results unchanged (304)")
+        view = _unseen(entry["view"], history)
+        etag = r.headers.get("ETag", entry.get("etag"))
+        last_modified = r.headers.get("Last-Modified", entry.get("last_modified"))
+    else:
+        view = _unseen([c for c in map(parse, posts) if c], history)
+        etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+
+    save(path, {
+        "url": url,
+        "params": params,
+        "etag": etag,
+        "last_modified": last_modified,
+        "max_age": _max_age(r.headers),
+        "fetched_at": now,
+        "fetched": datetime.datetime.fromtimestamp(now, datetime.timezone.utc).isoformat(timespec="seconds"),
+        "view": view,
+    })
+    return view
@@ -0,0 +1,37 @@
+"""
+Content-keyed randomness and stable IDs.
+
+In deterministic mode (DETERMINISTIC=1, or --deterministic on any entry
+point) every random choice is drawn from a generator seeded by the format,
+a content key (prompt, content ID...) and the purpose of the draw, so the
+same scenario always asks providers for the same images, picks the same
+backups and lands on the same cache entries. Outside that mode the
+generators are unseeded and behave as before.
+
+IDs are digests in both modes, so they never depend on the process
+(hash() is salted per interpreter) or on chance.
+"""
+import os
+import random
+import hashlib
+
+ENV_VAR = "DETERMINISTIC"
+
+def enabled():
+    return os.environ.get(ENV_VAR, "") not in ("", "0")
+
+def enable():
+    # Through the environment so spawned render workers inherit it
+    os.environ[ENV_VAR] = "1"
+
+def digest(*parts, length=12):
+    return hashlib.sha256("\x1f".join(map(str, parts)).encode('utf-8')).hexdigest()[:length]
+
+def stable_id(prefix, *parts):
+    return f"{prefix}_{digest(*parts, length=10)}"
+
+def rng(fmt, key, purpose=""):
+    """random.Random for one draw site: seeded from (fmt, key, purpose) in deterministic mode."""
+    if enabled():
+        return random.Random(int(digest(fmt, key, purpose, length=16), 16))
+    return random.Random()
@@ -0,0 +1,244 @@
+"""
+Shared Kokoro TTS layer with a persistent phrase cache.
+
+Scripts are split into phrase segments (sentences, fixed intros, pauses).
+Each segment is synthesized once and stored under a content-addressed key
+of (engine, voice, speed, text), so boilerplate like "Would you rather" or
+the fact intro costs nothing after the first run. Segments are stitched
+back together with short equal-power crossfades.
+
+Uncached segments are synthesized concurrently in a pool of worker
+processes, each holding its own loaded model and a slice of the CPU
+thread budget so the pool does not oversubscribe the machine.
+"""
+import os
+import re
+import json
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+SAMPLE_RATE = 24000
+ENGINE = "kokoro"
+REPO_ID = "hexgrad/Kokoro-82M"
+
+BASE_DIR = os.getcwd()
+TTS_CACHE_DIR = os.path.join(BASE_DIR, ".cache", "tts")
+
+CROSSFADE_SECONDS = 0.015
+SENTENCE_GAP_SECONDS = 0.12
+PAUSE_SECONDS = 0.4  # per "..." in a pause segment
+
+# A period after these is not a sentence end ("Dr. Smith", "the U.S. Army")
+ABBREVIATIONS = {"dr", "mr", "mrs", "ms", "st", "jr", "sr", "mt", "ft", "vs", "prof",
+                 "gen", "lt", "sgt", "capt", "approx", "e.g", "i.e", "u.s", "u.k", "d.c"}
+
+CPU_COUNT = os.cpu_count() or 1
+TTS_WORKERS = int(os.environ.get("TTS_WORKERS", max(1, min(4, CPU_COUNT // 2))))
+
+_pipelines = {}
+_pool = None
+
+# --- ENGINE ---
+
+def get_pipeline(lang_code="en-us"):
+    """Load a Kokoro pipeline once per process."""
+    if lang_code not in _pipelines:
+        import kokoro
+        _pipelines[lang_code] = kokoro.KPipeline(lang_code=lang_code, repo_id=REPO_ID)
+    return _pipelines[lang_code]
+
+def _to_float32(chunk):
+    """Pull the audio out of whatever a Kokoro generator yields."""
+    audio = getattr(chunk, 'audio', None)
+    if audio is None and isinstance(chunk, (list, tuple)) and len(chunk) == 3:
+        audio = chunk[2]
+    if audio is None:
+        audio = chunk
+    if hasattr(audio, 'detach'):
+        audio = audio.detach().cpu().numpy()
+    return np.asarray(audio, dtype=np.float32).reshape(-1)
+
+def synthesize(text, voice, speed=1.0, lang_code="en-us"):
+    """Run Kokoro on one piece of text and return a float32 buffer."""
+    pipeline = get_pipeline(lang_code)
+    chunks = [_to_float32(chunk) for chunk in pipeline(text, voice=voice, speed=speed)]
+    chunks = [c for c in chunks if c.size]
+    if not chunks:
+        raise ValueError(f"No audio generated for: {text[:40]}")
+    return np.concatenate(chunks)
+
+# --- WORKER POOL ---
+
+def _init_worker(threads):
+    import torch
+    torch.set_num_threads(threads)
+    get_pipeline()
+
+def _synthesize_job(job):
+    return synthesize(*job)
+
+def get_pool():
+    """Start the synthesis pool once; workers stay warm for the whole process."""
+    global _pool
+    if _pool is None:
+        threads = max(1, CPU_COUNT // TTS_WORKERS)
+        _pool = ProcessPoolExecutor(
+            max_workers=TTS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(threads,),
+        )
+    return _pool
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+def synthesize_many(jobs):
+    """
+    Synthesize (text, voice, speed) jobs, in parallel when there is more than one.
+    Results come back in job order, so output matches a sequential run.
+    """
+    if len(jobs) < 2 or TTS_WORKERS < 2:
+        return [synthesize(*job) for job in jobs]
+    print(f"  ⚡ Synthesizing {len(jobs)} phrases on {TTS_WORKERS} workers...")
+    return list(get_pool().map(_synthesize_job, jobs))
+
+# --- PHRASE CACHE ---
+
+class PhraseCache:
+    def __init__(self, cache_dir=TTS_CACHE_DIR, engine=ENGINE):
+        self.cache_dir = cache_dir
+        self.engine = engine
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, voice, speed, text):
+        raw = json.dumps([self.engine, voice, round(float(speed), 3), text])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, voice, speed, text):
+        return os.path.join(self.cache_dir, f"{self.key(voice, speed, text)}.npy")
+
+    def get(self, voice, speed, text):
+        path = self._path(voice, speed, text)
+        if os.path.exists(path):
+            try:
+                return np.load(path)
+            except Exception:
+                os.remove(path)
+        return None
+
+    def put(self, voice, speed, text, audio):
+        path = self._path(voice, speed, text)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.save(f, np.asarray(audio, dtype=np.float32))
+        os.replace(tmp, path)
+
+# --- SEGMENTS ---
+
+def split_phrases(text):
+    """
+    Split a script at sentence ends and "..." pauses.
+    Pauses come back as their own segment so they can be rendered as silence.
+    """
+    segments = []
+    for part in re.split(r"((?:\s*\.\.\.)+\s*)", text):
+        if not part.strip():
+            continue
+        if is_pause(part):
+            segments.append(part.strip())
+            continue
+        segments.extend(_sentences(part))
+    return segments
+
+def _sentence_end(before, after):
+    """Whether the punctuation closing `before` ends a sentence, given the text that follows."""
+    nxt = after.lstrip("\"'([“‘")
+    if not nxt or nxt[0].islower() or nxt[0].isdigit():
+        return False  # "approx. 3 feet", "wait... no. not that"
+    if not before.endswith("."):
+        return True
+    word = before.rsplit(None, 1)[-1].lstrip("\"'([“‘")
+    if word[:-1].lower() in ABBREVIATIONS:
+        return False
+    # Initials: "J. K. Rowling", "J.R.R. Tolkien", "U.S.A."
+    return not re.fullmatch(r"(?:[A-Z]\.)+", word)
+
+def _sentences(text):
+    """Split text at sentence ends, keeping abbreviations and initials intact."""
+    sentences, start = [], 0
+    for match in re.finditer(r"[.!?][\"'”’)]*\s+", text):
+        if _sentence_end(text[start:match.start() + 1], text[match.end():]):
+            sentences.append(text[start:match.end()].strip())
+            start = match.end()
+    sentences.append(text[start:].strip())
+    return [s for s in sentences if s]
+
+def is_pause(segment):
+    return not re.search(r"\w", segment)
+
+def pause(segment, sample_rate=SAMPLE_RATE):
+    beats = max(segment.count("..."), 1)
+    return np.zeros(int(beats * PAUSE_SECONDS * sample_rate), dtype=np.float32)
+
+def crossfade_join(chunks, seconds=CROSSFADE_SECONDS, sample_rate=SAMPLE_RATE):
+    """Concatenate buffers, overlapping each joint with an equal-power fade."""
+    chunks = [c for c in chunks if len(c)]
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+
+    fade = int(seconds * sample_rate)
+    overlaps = [min(fade, len(a), len(b)) for a, b in zip(chunks, chunks[1:])]
+    out = np.zeros(sum(len(c) for c in chunks) - sum(overlaps), dtype=np.float32)
+
+    pos = 0
+    for i, chunk in enumerate(chunks):
+        n = overlaps[i - 1] if i else 0
+        if n:
+            t = np.linspace(0.0, np.pi / 2, n, dtype=np.float32)
+            out[pos - n:pos] = out[pos - n:pos] * np.cos(t) + chunk[:n] * np.sin(t)
+        out[pos:pos + len(chunk) - n] = chunk[n:]
+        pos += len(chunk) - n
+    return out
+
+def speak(segments, voice, speed=1.0, cache=None, gap=SENTENCE_GAP_SECONDS):
+    """
+    Synthesize a list of segments (or a plain script), reusing cached phrases.
+    Spoken segments are separated by `gap` seconds of silence.
+    Returns one stitched float32 buffer at SAMPLE_RATE.
+    """
+    if isinstance(segments, str):
+        segments = split_phrases(segments)
+    cache = cache or PhraseCache()
+
+    spoken = [s for s in segments if not is_pause(s)]
+    found = {s: cache.get(voice, speed, s) for s in spoken}
+    misses = [s for s in dict.fromkeys(spoken) if found[s] is None]
+    for segment, audio in zip(misses, synthesize_many([(s, voice, speed) for s in misses])):
+        cache.put(voice, speed, segment, audio)
+        found[segment] = audio
+
+    silence = np.zeros(int(gap * SAMPLE_RATE), dtype=np.float32)
+    buffers = []
+    for i, segment in enumerate(segments):
+        if is_pause(segment):
+            buffers.append(pause(segment))
+            continue
+        if buffers and not is_pause(segments[i - 1]):
+            buffers.append(silence)
+        buffers.append(found[segment])
+
+    print(f"  ✓ TTS cache: {len(spoken) - len(misses)}/{len(spoken)} phrases reused")
+    return crossfade_join(buffers)
+
+def warm(scripts, voice, speed=1.0):
+    """Pre-synthesize every phrase of the given scripts into the cache in one parallel batch."""
+    segments = []
+    for script in scripts:
+        segments.extend(split_phrases(script) if isinstance(script, str) else script)
+    speak(segments, voice, speed)